@@ -0,0 +1,280 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted while the queue is at its maximum depth.
+    """
+
+class Job:
+    """
+    One AI move request and its outcome.
+
+    Args:
+        key (Any): Deduplication key, the game ID.
+        task (Callable[[], dict]): Work to run; its return value becomes the result.
+
+    Attributes:
+        id (str): Job ID handed to the client.
+        status (str): QUEUED, RUNNING, DONE or FAILED.
+        result (Optional[dict]): Return value of the task once DONE.
+        error (Optional[str]): Error message once FAILED.
+        submitted (float): monotonic() time of submission.
+        started (Optional[float]): monotonic() time the task started.
+        finished (Optional[float]): monotonic() time the task ended.
+        done (threading.Event): Set once the job is DONE or FAILED.
+    """
+
+    __slots__ = ("id", "key", "task", "status", "result", "error", "submitted", "started", "finished", "done")
+
+    def __init__(self, key: Any, task: Callable[[], dict]) -> None:
+        self.id = str(uuid.uuid4())
+        self.key = key
+        self.task = task
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def to_dict(self) -> dict:
+        data = {"job_id": self.id, "status": self.status}
+        if self.status == DONE:
+            data.update(self.result)
+        elif self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+class AIJobQueue:
+    """
+    Bounded queue of AI move jobs served by a fixed pool of worker threads.
+
+    The threads only coordinate: the tasks send their searches to SearchWorkers and wait for
+    them without holding the GIL.
+
+    At most one job per key is queued or running at a time: submitting a key that already has
+    an unfinished job returns that job instead of adding a second one. Finished jobs stay
+    available for `retention` seconds so clients can collect their result.
+
+    Args:
+        workers (int): Number of worker threads, the number of jobs run concurrently.
+        max_depth (int): Maximum number of queued jobs, not counting running ones.
+        retention (float, optional): Seconds a finished job is kept. Defaults to 300.
+
+    Public Methods:
+        submit(key, task): Queues a job, or returns the unfinished job of the same key.
+        get(job_id): Returns a job by ID.
+        metrics(): Returns queue depth, concurrency and throughput counters.
+    """
+
+    def __init__(self, workers: int, max_depth: int, retention: float = 300.0) -> None:
+        self.workers = workers
+        self.max_depth = max_depth
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[Any, Job] = {}
+        self._threads = []
+        self._counters = dict.fromkeys(("submitted", "deduplicated", "rejected", "completed", "failed"), 0)
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+        self._running = 0
+
+    def submit(self, key: Any, task: Callable[[], dict]) -> Job:
+        """
+        Queues a job, or returns the unfinished job already submitted for the same key.
+
+        Args:
+            key (Any): Deduplication key, the game ID.
+            task (Callable[[], dict]): Work to run on a worker thread.
+
+        Returns:
+            Job: The queued or deduplicated job.
+
+        Raises:
+            QueueFullError: If the queue is at its maximum depth.
+        """
+
+        with self._lock:
+            self._start_workers()
+            self._prune()
+            active = self._active.get(key)
+            if active is not None:
+                self._counters["deduplicated"] += 1
+                return active
+
+            job = Job(key, task)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._counters["rejected"] += 1
+                raise QueueFullError(f"The AI queue is full ({self.max_depth} jobs waiting).")
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._counters["submitted"] += 1
+            return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Returns a job by ID.
+
+        Args:
+            job_id (str): ID returned by submit().
+
+        Returns:
+            Optional[Job]: The job, or None if it is unknown or expired.
+        """
+
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def metrics(self) -> dict:
+        """
+        Returns the current queue depth and concurrency, and counters since startup.
+
+        Returns:
+            dict: Depth, running jobs, worker count, job counters and average wait and run times.
+        """
+
+        with self._lock:
+            finished = self._counters["completed"] + self._counters["failed"]
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "running": self._running,
+                "workers": self.workers,
+                **self._counters,
+                "avg_wait_seconds": self._wait_seconds / finished if finished else 0.0,
+                "avg_run_seconds": self._run_seconds / finished if finished else 0.0,
+            }
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"ai-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished is not None and now - job.finished > self.retention]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                job.status = RUNNING
+                job.started = time.monotonic()
+                self._running += 1
+
+            try:
+                result, status, error = job.task(), DONE, None
+            except Exception as exc:
+                result, status, error = None, FAILED, str(exc) or type(exc).__name__
+
+            with self._lock:
+                job.result, job.error, job.status = result, error, status
+                job.finished = time.monotonic()
+                self._running -= 1
+                self._counters["completed" if status == DONE else "failed"] += 1
+                self._wait_seconds += job.started - job.submitted
+                self._run_seconds += job.finished - job.started
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+            job.done.set()
+            self._queue.task_done()
+
+class SearchWorkers:
+    """
+    Worker processes running AI searches away from the API process.
+
+    Searches are CPU-bound and hold the GIL, so on threads of the API process they delay every
+    request served by its event loop. Each process runs one search at a time, and the searches
+    of a game always go to the same process, so that the tree its ponderer kept since the last
+    move is found again. Processes are started by a fork server rather than forked from the
+    API process, whose other threads may hold locks at the time.
+
+    Args:
+        processes (int): Number of worker processes.
+
+    Public Methods:
+        start(): Starts every process, so that the first searches do not wait for one.
+        submit(key, func, *args): Runs a function in the process of a key.
+        submit_all(func, *args): Runs a function in every process.
+        shutdown(): Stops the processes.
+    """
+
+    def __init__(self, processes: int) -> None:
+        self.processes = processes
+        self._executors: List[ProcessPoolExecutor] = []
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Starts every process and waits until they are ready.
+        """
+
+        for future in self.submit_all(os.getpid):
+            future.result()
+
+    def submit(self, key: Any, func: Callable[..., Any], *args: Any) -> Future:
+        """
+        Runs a function in the process the key is routed to, after the work already sent to it.
+
+        Args:
+            key (Any): Routing key, the game ID.
+            func (Callable): Module-level function, so that it can be pickled.
+            *args (Any): Picklable arguments.
+
+        Returns:
+            Future: The function's result.
+        """
+
+        executors = self._get_executors()
+        return executors[hash(key) % len(executors)].submit(func, *args)
+
+    def submit_all(self, func: Callable[..., Any], *args: Any) -> List[Future]:
+        """
+        Runs a function once in every process, such as to collect per-process metrics.
+
+        Args:
+            func (Callable): Module-level function, so that it can be pickled.
+            *args (Any): Picklable arguments.
+
+        Returns:
+            list[Future]: The result of each process.
+        """
+
+        return [executor.submit(func, *args) for executor in self._get_executors()]
+
+    def shutdown(self) -> None:
+        """
+        Stops the processes, abandoning queued work.
+        """
+
+        with self._lock:
+            executors, self._executors = self._executors, []
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_executors(self) -> List[ProcessPoolExecutor]:
+        with self._lock:
+            if not self._executors:
+                context = multiprocessing.get_context("forkserver")
+                self._executors = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(self.processes)]
+            return self._executors
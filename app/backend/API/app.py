@@ -1,23 +1,29 @@
-from fastapi import FastAPI, Depends, Response, Request
+from fastapi import FastAPI, Depends, Response, Request, HTTPException, Query
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import OAuth2PasswordBearer
 
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from typing import Annotated, Any, Callable, Optional
+import asyncio
+import copy
+import functools
+import time
 import uuid
 
 from jose import jwt
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.database import deps
 
 from backend.API.schemas import GameConfig, PlayerMove, User
 
-from backend.database import crud, models
-from backend.database.database import engine, Base
+from backend.database import crud, async_crud, models
+from backend.database.database import engine, async_engine, Base, Session as SessionLocal
 
-from backend.game_scripts import main
+from backend.game_scripts import main, game_state, parallel_mcts, constants
 
-from . import auth
+from . import auth, ai_queue, game_cache
 
 import os
 
@@ -29,6 +35,60 @@ app.mount("/frontend/dist", StaticFiles(directory="frontend/dist"), name="fronte
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login-user")
 
+AI_MAX_WAIT = 30.0
+AI_POLL_INTERVAL = 0.05
+AI_METRICS_WAIT = 1.0
+
+ai_jobs = ai_queue.AIJobQueue(workers=int(os.getenv("AI_WORKERS", 2)), max_depth=int(os.getenv("AI_QUEUE_SIZE", 64)))
+search_workers = ai_queue.SearchWorkers(int(os.getenv("AI_WORKERS", 2)))
+
+# Game logic and password hashing are CPU-bound, so handlers run them here rather than on the event loop
+cpu_executor = ThreadPoolExecutor(max_workers=int(os.getenv("CPU_WORKERS", 4)), thread_name_prefix="cpu")
+
+async def run_cpu(func: Callable[..., Any], *args: Any) -> Any:
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, functools.partial(func, *args))
+
+def load_game(game_id: uuid.UUID) -> dict:
+    db = SessionLocal()
+    try:
+        return crud.get_game(db, game_id)
+    finally:
+        db.close()
+
+def write_game(game_id: uuid.UUID, moves: list, snapshot: Optional[dict], status: models.StateEnum) -> None:
+    db = SessionLocal()
+    try:
+        if not crud.add_moves(db, game_id, moves, snapshot, status):
+            raise game_cache.StaleGameError(f"Game {game_id} has moves logged by another process.")
+    finally:
+        db.close()
+
+games = game_cache.GameCache(load_game, write_game, max_games=int(os.getenv("GAME_CACHE_GAMES", 1024)), max_bytes=int(os.getenv("GAME_CACHE_MB", 256)) << 20,
+                             idle_seconds=float(os.getenv("GAME_CACHE_IDLE_SECONDS", 1800)), flush_delay=float(os.getenv("GAME_CACHE_FLUSH_SECONDS", 0.5)))
+
+def move_status(game: game_state.GameState, status: models.StateEnum) -> models.StateEnum:
+    # Status written with a move: the game is in progress after a player move and a zombie after an AI move until it ends
+    return models.StateEnum.completed if main.is_game_over(game) else status
+
+async def game_record(game_id: uuid.UUID, db: AsyncSession) -> Optional[dict]:
+    # Reads the record of an uncached game asynchronously, so that the cache does not block on a miss
+    if games.contains(game_id):
+        return None
+    return await async_crud.get_game(db, game_id)
+
+@app.on_event("startup")
+async def start_search_workers():
+    await run_cpu(search_workers.start)
+    await run_cpu(parallel_mcts.start, constants.parallel_workers)
+
+@app.on_event("shutdown")
+async def flush_games():
+    await run_cpu(games.flush_all)
+    cpu_executor.shutdown()
+    search_workers.shutdown()
+    parallel_mcts.shutdown()
+    await async_engine.dispose()
+
 @app.get("/")
 def serve_home():
     return FileResponse("frontend/dist/index.html")
@@ -58,65 +118,108 @@ def serve_settings():
     return FileResponse("frontend/dist/settings.html")
 
 @app.post("/create-game")
-def create_game(config: GameConfig, db: Session = Depends(deps.get_db)):
-    game = main.create_game(config.difficulty, config.height, config.width, config.full)
-    game_data = main.get_game_data(game)
-    uuid = crud.create_game(db, game_data)
-    crud.update_game_state(db, uuid, "INITIATED")
+async def create_game(config: GameConfig, db: AsyncSession = Depends(deps.get_async_db)):
+    game = await run_cpu(main.create_game, config.difficulty, config.height, config.width, config.full)
+    uuid = await async_crud.create_game(db, await run_cpu(main.get_game_record, game))
+    games.add(uuid, game)
 
     return {"game_id": uuid}
 
-@app.get("/get-game/{game_id}")
-def get_game(game_id: uuid.UUID, db: Session = Depends(deps.get_db)):
-    game_data = crud.get_game(db, game_id)
-    game_over = main.is_game_over(main.restore_game_from_data(game_data))
-    if game_over:
-        crud.update_game_state(db, game_id, "COMPLETED")
+def read_game(game_id: uuid.UUID, record: Optional[dict]) -> dict:
+    with games.checkout(game_id, record) as game:
+        return {"game": main.get_game_data(game), "game_over": main.is_game_over(game)}
 
-    return {"game": game_data, "game_over": game_over}
+@app.get("/get-game/{game_id}")
+async def get_game(game_id: uuid.UUID, db: AsyncSession = Depends(deps.get_async_db)):
+    return await run_cpu(read_game, game_id, await game_record(game_id, db))
+
+def discard_ponder_tree(game_id: uuid.UUID) -> None:
+    # Queued behind the searches of the game's process rather than waited for
+    search_workers.submit(game_id, main.discard_ponder_tree, game_id)
+
+def run_ai_move(game_id: uuid.UUID) -> dict:
+    # Search a copy so that the game stays readable, and the move is dropped if the game moved on
+    with games.checkout(game_id) as game:
+        if main.is_game_over(game) or not game.is_Ai_turn():
+            return {"valid_move": not main.is_game_over(game)}
+        search_game, turn = copy.deepcopy(game), main.get_turn(game)
+
+    # Insane searches already run in the parallel_mcts pool, the others in the game's search process
+    if main.searches_in_pool(search_game):
+        ai_move = main.get_ai_move(search_game, ponder_key=game_id)
+    else:
+        ai_move = search_workers.submit(game_id, main.search_ai_move, search_game.to_bytes(), game_id).result()
+    with games.checkout(game_id) as game:
+        if main.get_turn(game) != turn or not main.make_player_move(game, ai_move):
+            return {"valid_move": False}
+        games.record(game_id, ai_move, move_status(game, models.StateEnum.zombie))
+        if main.is_game_over(game):
+            discard_ponder_tree(game_id)
+    return {"valid_move": True}
 
 @app.put("/ai/{game_id}")
-def start_game(game_id: uuid.UUID, db: Session = Depends(deps.get_db)):
-    if crud.get_game_state(db, game_id) == "COMPLETED":
-        return {"valid_move": False}
-    
-    game_data = crud.get_game(db, game_id)
-    game = main.restore_game_from_data(game_data)
-    val = main.make_ai_move(game)
-    game_data = main.get_game_data(game)
-    crud.update_game(db, game_id, game_data)
-    crud.update_game_state(db, game_id, "ZOMBIE")
-    return {"valid_move": val}
+async def start_game(game_id: uuid.UUID):
+    try:
+        job = ai_jobs.submit(game_id, lambda: run_ai_move(game_id))
+    except ai_queue.QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
+    return job.to_dict()
+
+@app.get("/ai-job/{job_id}")
+async def get_ai_job(job_id: str, wait: Annotated[float, Query(ge=0, le=AI_MAX_WAIT)] = 0):
+    job = ai_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired AI job.")
+
+    deadline = time.monotonic() + wait
+    while not job.done.is_set() and time.monotonic() < deadline:
+        await asyncio.sleep(AI_POLL_INTERVAL)
+
+    return job.to_dict()
+
+def search_metrics() -> list:
+    # A process busy with a search answers after it, so the metrics of busy processes are left out
+    futures = search_workers.submit_all(main.get_search_metrics)
+    wait_futures(futures, timeout=AI_METRICS_WAIT)
+    return [future.result() if future.done() else None for future in futures]
+
+@app.get("/ai-metrics")
+async def get_ai_metrics():
+    return {**ai_jobs.metrics(), **main.get_search_metrics(), "search_processes": await run_cpu(search_metrics)}
+
+@app.get("/game-cache-metrics")
+async def get_game_cache_metrics():
+    return games.metrics()
+
+def play_move(game_id: uuid.UUID, record: Optional[dict], move: str) -> dict:
+    with games.checkout(game_id, record) as game:
+        if main.is_game_over(game) or not main.make_player_move(game, move):
+            return {"valid_move": False}
+        games.record(game_id, move, move_status(game, models.StateEnum.inprogress))
+        if main.is_game_over(game):
+            discard_ponder_tree(game_id)
+    return {"valid_move": True}
 
 @app.put("/move/{game_id}")
-def player_move(game_id: uuid.UUID, move: PlayerMove, db: Session = Depends(deps.get_db)):
-    if crud.get_game_state(db, game_id) == "COMPLETED":
-        return {"valid_move": False}
-    
-    game_data = crud.get_game(db, game_id)
-    game = main.restore_game_from_data(game_data)
-    if not main.make_player_move(game, move.move):
-        return {"valid_move": False}
-    game_data = main.get_game_data(game)
-    crud.update_game(db, game_id, game_data)
-    crud.update_game_state(db, game_id, "INPROGRESS")
-    return {"valid_move": True}
+async def player_move(game_id: uuid.UUID, move: PlayerMove, db: AsyncSession = Depends(deps.get_async_db)):
+    return await run_cpu(play_move, game_id, await game_record(game_id, db), move.move)
 
 @app.post("/register-user")
-async def read_items(user: User, db: Session = Depends(deps.get_db)):
-    existing_user = crud.get_user(db, user.email)
+async def read_items(user: User, db: AsyncSession = Depends(deps.get_async_db)):
+    existing_user = await async_crud.get_user(db, user.email)
     if existing_user:
         return {"id": None}
     
-    hashed_pw = auth.get_hashed_password(user.password)
-    user_id = crud.create_user(db, user.email, hashed_pw)
+    hashed_pw = await run_cpu(auth.get_hashed_password, user.password)
+    user_id = await async_crud.create_user(db, user.email, hashed_pw)
 
     return {"id": user_id}
 
 @app.post("/login-user")
-def login(user_login: User, response: Response, db: Session = Depends(deps.get_db)):
-    user = crud.get_user(db, user_login.email)
-    if not user or not auth.verify_password(user_login.password, user.hashed_password):
+async def login(user_login: User, response: Response, db: AsyncSession = Depends(deps.get_async_db)):
+    user = await async_crud.get_user(db, user_login.email)
+    if not user or not await run_cpu(auth.verify_password, user_login.password, user.hashed_password):
         return {"login": False}
     
     token = auth.create_access_token({"sub": user.email})
@@ -131,23 +234,23 @@ def login(user_login: User, response: Response, db: Session = Depends(deps.get_d
     return {"login": True}
 
 @app.get("/get-player-stats")
-def get_stats(request: Request, db: Session = Depends(deps.get_db)):
+async def get_stats(request: Request, db: AsyncSession = Depends(deps.get_async_db)):
     token = request.cookies.get("access_token")
     payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
     user_email = payload.get("sub")
 
-    user = crud.get_user(db, user_email)
+    user = await async_crud.get_user(db, user_email)
     stats = crud.get_user_stats(user)
 
     return stats
 
 @app.get("/get-player-info")
-def get_info(request: Request, db: Session = Depends(deps.get_db)):
+async def get_info(request: Request, db: AsyncSession = Depends(deps.get_async_db)):
     token = request.cookies.get("access_token")
     payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
     user_email = payload.get("sub")
 
-    user = crud.get_user(db, user_email)
+    user = await async_crud.get_user(db, user_email)
     info = crud.get_user_info(user)
 
     return info
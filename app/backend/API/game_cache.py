@@ -0,0 +1,369 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+import threading
+import time
+
+from backend.game_scripts import game_state, main
+
+# Rough in-memory size of a restored game, fitted with tracemalloc on 5x5 to 19x19 games
+GAME_BYTES = 6000
+CELL_BYTES = 180
+HASH_BYTES = 70
+
+# Delay before retrying a game whose write failed, doubled per consecutive failure up to the cap
+RETRY_SECONDS = 1.0
+MAX_RETRY_SECONDS = 60.0
+
+IDLE, LRU, MEMORY = "idle", "lru", "memory"
+
+class StaleGameError(Exception):
+    """
+    Raised by a write when the database already holds moves the cached game does not have.
+    """
+
+class CacheEntry:
+    """
+    Live game kept by the cache, with the writes not yet flushed to the database.
+
+    Args:
+        game (GameState): The game.
+        snapshot (bool): Whether the next flush must store a snapshot.
+
+    Attributes:
+        lock (threading.Lock): Held while a request reads or changes the game.
+        users (int): Requests holding or waiting for the entry, which keep it from eviction.
+        moves (list[tuple[int, str, Optional[bytes]]]): Turn number, move and diff of every move not yet flushed.
+        status (Any): Status of the game recorded with its last move, written with the moves.
+        dirty_since (Optional[float]): monotonic() time of the oldest unflushed move.
+        retry_at (float): monotonic() time before which the flusher leaves the entry alone after failed writes.
+        failures (int): Consecutive failed writes.
+        last_used (float): monotonic() time of the last checkout.
+        size (int): Estimated memory of the game in bytes.
+    """
+
+    __slots__ = ("game", "snapshot", "lock", "users", "moves", "status", "dirty_since", "retry_at", "failures", "last_used", "size")
+
+    def __init__(self, game: game_state.GameState, snapshot: bool) -> None:
+        self.game = game
+        self.snapshot = snapshot
+        self.lock = threading.Lock()
+        self.users = 0
+        self.moves: List[Tuple[int, str, Optional[bytes]]] = []
+        self.status = None
+        self.dirty_since = None
+        self.retry_at = 0.0
+        self.failures = 0
+        self.last_used = time.monotonic()
+        self.size = game_bytes(game)
+
+class GameCache:
+    """
+    Per-process LRU cache of live games, written back to the database in the background.
+
+    A request checks a game out, which loads it on a miss, and records the moves it plays. The
+    moves of a game are coalesced and written by a flusher thread `flush_delay` seconds after the
+    first of them, in one transaction; a game that ends is flushed at once by its request. A game
+    whose write fails is retried after RETRY_SECONDS, doubled per consecutive failure up to
+    MAX_RETRY_SECONDS, while the other games keep being flushed. Games idle for `idle_seconds`,
+    beyond the `max_games` most recent, or beyond `max_bytes` of estimated memory are evicted,
+    least recently used first, once they are flushed and no request holds them; dirty games only
+    leave after the flusher has written them.
+
+    Each process keeps its own cache, so games must be routed to one process, as the AI queue
+    already requires.
+
+    Args:
+        load (Callable[[Any], dict]): Reads the record of a game, as crud.get_game() returns it.
+        write (Callable[[Any, list, Optional[dict], Any], None]): Writes the logged moves of a
+            game, a snapshot record or None, and the status recorded with the last move, in one
+            transaction.
+            Raises StaleGameError if another process has logged moves of the game since it was
+            loaded, in which case its cached copy and pending moves are dropped.
+        max_games (int): Number of games kept.
+        max_bytes (int): Estimated memory of the games kept.
+        idle_seconds (float): Time after which an unused game is evicted.
+        flush_delay (float): Time writes are held to coalesce them.
+
+    Public Methods:
+        checkout(key, record): Context manager holding a game, loaded on a miss, for one request.
+        contains(key): Tells whether a game is cached.
+        add(key, game): Caches a newly created game.
+        record(key, move, status): Logs a move just played on a checked-out game for write-back.
+        flush(key): Writes a game's pending moves now.
+        flush_all(): Writes the pending moves of every game.
+        metrics(): Returns hit, eviction and flush counters.
+    """
+
+    def __init__(self, load: Callable[[Any], dict], write: Callable[[Any, list, Optional[dict], Any], None], max_games: int, max_bytes: int, idle_seconds: float, flush_delay: float) -> None:
+        self.load = load
+        self.write = write
+        self.max_games = max_games
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.flush_delay = flush_delay
+        self._entries: "OrderedDict[Any, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+        self._counters = dict.fromkeys(("hits", "misses", "flushes", "flushed_moves", "flush_errors", "conflicts"), 0)
+        self._evictions = dict.fromkeys((IDLE, LRU, MEMORY), 0)
+        self._flush_lag = 0.0
+        self._max_flush_lag = 0.0
+
+    @contextmanager
+    def checkout(self, key: Any, record: Optional[dict] = None) -> Iterator[game_state.GameState]:
+        """
+        Holds a game for the duration of a request, loading it from the database on a miss.
+
+        Args:
+            key (Any): The game ID.
+            record (dict, optional): Record of the game already read by the caller, restored
+                instead of calling `load` on a miss.
+
+        Yields:
+            GameState: The cached game, only to be changed by this request until it is released.
+        """
+
+        entry = self._acquire(key, record)
+        entry.lock.acquire()
+        while self._entries.get(key) is not entry:
+            # Dropped as stale while this request waited for it
+            entry.lock.release()
+            with self._lock:
+                entry.users -= 1
+            entry = self._acquire(key)
+            entry.lock.acquire()
+        try:
+            yield entry.game
+        finally:
+            entry.lock.release()
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+                self._evict()
+            if entry.moves and main.is_game_over(entry.game):
+                try:
+                    self._flush(key, entry)
+                except Exception:
+                    # Left to the flusher, which retries it
+                    pass
+
+    def contains(self, key: Any) -> bool:
+        """
+        Tells whether a game is cached, so that a caller can read its record itself on a miss.
+
+        Args:
+            key (Any): The game ID.
+
+        Returns:
+            bool: True if the game is cached.
+        """
+
+        with self._lock:
+            return key in self._entries
+
+    def add(self, key: Any, game: game_state.GameState) -> None:
+        """
+        Caches a game just created and stored, so that its first requests need no load.
+
+        Args:
+            key (Any): The game ID.
+            game (GameState): The game.
+        """
+
+        with self._lock:
+            if key not in self._entries:
+                entry = self._entries[key] = CacheEntry(game, False)
+                self._bytes += entry.size
+            self._evict()
+
+    def record(self, key: Any, move: str, status: Any) -> None:
+        """
+        Logs the move just played on a checked-out game. A move ending the game is flushed when
+        the game is released.
+
+        Args:
+            key (Any): The game ID.
+            move (str): The node ID or "pass" played.
+            status (Any): Status of the game after the move, written along with it.
+        """
+
+        with self._lock:
+            entry = self._entries[key]
+            game = entry.game
+            entry.moves.append((main.get_turn(game), move, main.get_move_diff(game, move)))
+            entry.status = status
+            entry.snapshot = entry.snapshot or main.snapshot_due(game)
+            size = game_bytes(game)
+            self._bytes += size - entry.size
+            entry.size = size
+            if entry.dirty_since is None:
+                entry.dirty_since = time.monotonic()
+            self._start_flusher()
+            self._wake.notify_all()
+
+    def flush(self, key: Any) -> None:
+        """
+        Writes the pending moves of a game now, and its snapshot if one is due.
+
+        Args:
+            key (Any): The game ID.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            self._flush(key, entry)
+
+    def flush_all(self) -> None:
+        """
+        Writes the pending moves of every cached game, such as at shutdown.
+        """
+
+        with self._lock:
+            dirty = [(key, entry) for key, entry in self._entries.items() if entry.moves]
+        for key, entry in dirty:
+            self._flush(key, entry)
+
+    def metrics(self) -> dict:
+        """
+        Returns the current size of the cache and counters since startup.
+
+        Returns:
+            dict: Games, estimated bytes and dirty games kept, hits, misses and hit rate,
+            evictions by reason, flush and conflict counters, and average and largest flush lag.
+        """
+
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                "games": len(self._entries),
+                "bytes": self._bytes,
+                "dirty": sum(1 for entry in self._entries.values() if entry.moves),
+                **self._counters,
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+                "evictions": dict(self._evictions),
+                "avg_flush_lag_seconds": self._flush_lag / self._counters["flushes"] if self._counters["flushes"] else 0.0,
+                "max_flush_lag_seconds": self._max_flush_lag,
+            }
+
+    def _acquire(self, key: Any, record: Optional[dict] = None) -> CacheEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._counters["hits"] += 1
+                self._entries.move_to_end(key)
+                entry.users += 1
+                return entry
+            self._counters["misses"] += 1
+
+        if record is None:
+            record = self.load(key)
+        loaded = CacheEntry(main.restore_game_from_record(record), "state" not in record)
+        with self._lock:
+            # Another request may have loaded the game meanwhile; its entry wins
+            entry = self._entries.setdefault(key, loaded)
+            if entry is loaded:
+                self._bytes += entry.size
+            self._entries.move_to_end(key)
+            entry.users += 1
+            self._evict()
+            return entry
+
+    def _flush(self, key: Any, entry: CacheEntry) -> None:
+        with entry.lock:
+            with self._lock:
+                moves, status, dirty_since = entry.moves, entry.status, entry.dirty_since
+                if not moves:
+                    return
+                entry.moves, entry.dirty_since = [], None
+            snapshot = main.get_game_record(entry.game) if entry.snapshot else None
+            try:
+                self.write(key, moves, snapshot, status)
+            except StaleGameError:
+                with self._lock:
+                    self._counters["conflicts"] += 1
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                        self._bytes -= entry.size
+                raise
+            except Exception:
+                with self._lock:
+                    entry.moves = moves + entry.moves
+                    entry.dirty_since = dirty_since
+                    entry.failures += 1
+                    entry.retry_at = time.monotonic() + min(RETRY_SECONDS * 2 ** (entry.failures - 1), MAX_RETRY_SECONDS)
+                    self._counters["flush_errors"] += 1
+                raise
+            entry.snapshot = False
+            entry.failures = 0
+
+        lag = time.monotonic() - dirty_since
+        with self._lock:
+            self._counters["flushes"] += 1
+            self._counters["flushed_moves"] += len(moves)
+            self._flush_lag += lag
+            self._max_flush_lag = max(self._max_flush_lag, lag)
+            self._evict()
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if now - entry.last_used > self.idle_seconds:
+                reason = IDLE
+            elif len(self._entries) > self.max_games:
+                reason = LRU
+            elif self._bytes > self.max_bytes:
+                reason = MEMORY
+            else:
+                # Entries are in order of use, so the rest are neither idle nor needed to fit
+                break
+            if entry.users or entry.moves or entry.lock.locked():
+                continue
+            del self._entries[key]
+            self._bytes -= entry.size
+            self._evictions[reason] += 1
+
+    def _start_flusher(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, name="game-cache-flush", daemon=True)
+            self._thread.start()
+
+    def _next_due(self) -> Tuple[Optional[Tuple[Any, CacheEntry]], Optional[float]]:
+        # A game whose writes keep failing waits for its retry_at, so the others are still flushed
+        due = [(max(entry.dirty_since + self.flush_delay, entry.retry_at), key, entry) for key, entry in self._entries.items() if entry.dirty_since is not None]
+        if not due:
+            return None, self.idle_seconds
+        due_at, key, entry = min(due, key=lambda item: item[0])
+        wait = due_at - time.monotonic()
+        return ((key, entry), None) if wait <= 0 else (None, wait)
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                self._evict()
+                due, wait = self._next_due()
+                while due is None:
+                    self._wake.wait(timeout=wait)
+                    self._evict()
+                    due, wait = self._next_due()
+            try:
+                self._flush(*due)
+            except Exception:
+                # Stale games are dropped; others stay dirty until their retry_at, counted in flush_errors
+                pass
+
+def game_bytes(game: game_state.GameState) -> int:
+    """
+    Estimates the memory held by a restored game.
+
+    Args:
+        game (GameState): The game.
+
+    Returns:
+        int: Estimated size in bytes.
+    """
+
+    return GAME_BYTES + CELL_BYTES * game.board.size + HASH_BYTES * len(game.prev_graphs)
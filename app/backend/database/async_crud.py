@@ -0,0 +1,40 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from . import models
+from .crud import game_query, game_record
+
+import uuid
+
+# Async versions of the crud functions the request handlers use. Relationships are loaded
+# eagerly, since lazy loads are not available on an AsyncSession.
+
+async def create_game(db: AsyncSession, game: dict):
+    new_game = models.Game(state=game["state"], ai_player_colors=game["ai_players"], difficulty=game["difficulty"],
+                           komi=game["komi"], height=game["height"], width=game["width"], passes=game["passes"])
+    db.add(new_game)
+    await db.flush()
+    db.add(models.Status(state=models.StateEnum.initiated, game_id=new_game.id))
+    await db.commit()
+    return new_game.id
+
+async def get_game(db: AsyncSession, id: uuid.UUID):
+    return game_record((await db.execute(game_query(id))).all())
+
+async def create_user(db: AsyncSession, user_email: str, user_hashed_password):
+    user = models.User(email=user_email, hashed_password=user_hashed_password)
+    db.add(user)
+    await db.flush()
+
+    user_stats = models.UserStats(user_id=user.id)
+    db.add_all([models.UserSettings(user_id=user.id), user_stats])
+    await db.flush()
+
+    db.add_all([models.AiStats(difficulty=diff, user_stats_id=user_stats.id) for diff in models.DifficultyEnum])
+    await db.commit()
+    return user.id
+
+async def get_user(db: AsyncSession, email: str):
+    query = (select(models.User).where(models.User.email == email)
+             .options(selectinload(models.User.stats).selectinload(models.UserStats.ai_stats)))
+    return (await db.execute(query)).scalars().first()
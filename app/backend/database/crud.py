@@ -1,20 +1,30 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session, joinedload
 from . import models
 
 import json, uuid
 
 def create_game(db: Session, game: dict):
-    new_game = models.Game(turns=json.dumps(game["turns"]), players=json.dumps(game["players"]),ai_player_colors=game["ai_players"], difficulty=game["difficulty"],
-                           komi=game["komi"], graph=json.dumps(game["graph"]), height=game["height"], width=game["width"], passes=game["passes"],
-                           prev_graphs=json.dumps(game["prev_graphs"]))
+    new_game = models.Game(state=game["state"], ai_player_colors=game["ai_players"], difficulty=game["difficulty"],
+                           komi=game["komi"], height=game["height"], width=game["width"], passes=game["passes"])
     db.add(new_game)
     db.flush()
     db.add(models.Status(state=models.StateEnum.initiated, game_id=new_game.id))
     db.commit()
     return new_game.id
 
-def get_game(db: Session, id: uuid.UUID):
-    game = db.query(models.Game).filter(models.Game.id == id).first()
+def game_query(id: uuid.UUID):
+    # The snapshot and the moves logged after it, in one query
+    return (select(models.Game, models.GameMove.move, models.GameMove.diff)
+            .outerjoin(models.GameMove, and_(models.GameMove.game_id == models.Game.id, models.GameMove.turn > models.Game.snapshot_turn))
+            .where(models.Game.id == id).order_by(models.GameMove.turn))
+
+def game_record(rows):
+    game = rows[0][0]
+    if game.state is not None:
+        return {"state": bytes(game.state), "moves": [(move, None if diff is None else bytes(diff)) for _, move, diff in rows if move is not None]}
+
+    # Rows written before the binary state column only have the JSON columns
     game = {
         "turns": json.loads(game.turns),
         "players": json.loads(game.players),
@@ -29,26 +39,37 @@ def get_game(db: Session, id: uuid.UUID):
     }
     return game
 
-def get_game_state(db: Session, id: uuid.UUID):
-    game = db.query(models.Game).filter(models.Game.id == id).first()
-
-    return game.game_status.state
-
-def update_game_state(db: Session, id: uuid.UUID, new_state: str):
-    game = db.query(models.Game).filter(models.Game.id == id).first()
-    game.game_status.state = new_state
-
-    return
-
-def update_game(db: Session, id: uuid.UUID, game_data: dict):
-    game = db.query(models.Game).filter(models.Game.id == id).first()
-    game.turns = json.dumps(game_data["turns"])
-    game.players = json.dumps(game_data["players"])
-    game.graph = json.dumps(game_data["graph"])
-    game.passes = game_data["passes"]
-    game.prev_graphs = json.dumps(game_data["prev_graphs"])
+def get_game(db: Session, id: uuid.UUID):
+    return game_record(db.execute(game_query(id)).all())
+
+def add_moves(db: Session, id: uuid.UUID, moves: list, snapshot: dict = None, status: models.StateEnum = None):
+    # Locks the game and its status in one query, so concurrent writers queue up behind each other
+    game = (db.query(models.Game).options(joinedload(models.Game.game_status, innerjoin=True))
+            .filter(models.Game.id == id).with_for_update().one())
+    turn = game.turn
+    if game.state is None:
+        # Rows written before the turn column keep their turn count in the JSON columns
+        turn = max(turn, json.loads(game.turns)["Total"])
+    if moves[0][0] != turn + 1:
+        # Another writer logged moves this one has not seen
+        db.rollback()
+        return False
+
+    db.add_all([models.GameMove(game_id=id, turn=turn, move=move, diff=diff) for turn, move, diff in moves])
+    game.turn = moves[-1][0]
+    if snapshot is not None:
+        game.state = snapshot["state"]
+        game.snapshot_turn = moves[-1][0]
+        game.passes = snapshot["passes"]
+        game.turns = game.players = game.graph = game.prev_graphs = None
+    if status is not None:
+        game.game_status.state = status
     db.commit()
-    return
+    return True
+
+def get_moves(db: Session, id: uuid.UUID):
+    return [(move.turn, move.move, move.diff) for move in
+            db.query(models.GameMove).filter(models.GameMove.game_id == id).order_by(models.GameMove.turn).all()]
 
 def create_user(db: Session, user_email: str, user_hashed_password):
     user = models.User(email=user_email, hashed_password=user_hashed_password)
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 import os
@@ -8,7 +9,11 @@ SQL_USERNAME = os.getenv("SQL_USERNAME")
 POSTGRES_CONTAINER = os.getenv("POSTGRES_CONTAINER")
 
 engine = create_engine(f"postgresql+psycopg2://{SQL_USERNAME}:{SQL_PASSWORD}@{POSTGRES_CONTAINER}:5432/signal_siege_database", echo=True)
+# Used by the request handlers; the sync engine stays for the AI workers and the game cache flusher, which run on threads
+async_engine = create_async_engine(f"postgresql+asyncpg://{SQL_USERNAME}:{SQL_PASSWORD}@{POSTGRES_CONTAINER}:5432/signal_siege_database", echo=True,
+                                   pool_size=int(os.getenv("SQL_POOL_SIZE", 20)), max_overflow=int(os.getenv("SQL_MAX_OVERFLOW", 20)))
 
 Base = declarative_base()
 
-Session = sessionmaker(bind=engine)
\ No newline at end of file
+Session = sessionmaker(bind=engine)
+AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
\ No newline at end of file
@@ -1,8 +1,12 @@
-from .database import Session
+from .database import Session, AsyncSession
 
 def get_db():
     db = Session()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSession() as db:
+        yield db
\ No newline at end of file
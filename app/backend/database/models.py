@@ -1,7 +1,7 @@
-from sqlalchemy import ForeignKey, Column, BigInteger, Enum, Integer, CheckConstraint, String, Float
+from sqlalchemy import ForeignKey, Column, BigInteger, Enum, Integer, CheckConstraint, String, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .database import Base
-from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY, BYTEA
 import uuid
 import enum
 
@@ -23,18 +23,22 @@ class Game(Base):
     __tablename__ = "games_info"
     
     id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True, nullable=False)
-    turns = Column(JSONB, nullable=False)
-    players = Column(JSONB, nullable=False)
+    state = Column(BYTEA, nullable=True)
+    snapshot_turn = Column(Integer, nullable=False, default=0)
+    turn = Column(Integer, nullable=False, default=0)
+    turns = Column(JSONB, nullable=True)
+    players = Column(JSONB, nullable=True)
     ai_player_colors = Column(ARRAY(String), nullable=True)
     difficulty = Column(Enum(DifficultyEnum), nullable=False)
     komi = Column(Float, nullable=False)
-    graph = Column(JSONB, nullable=False)
+    graph = Column(JSONB, nullable=True)
     height = Column(Integer, nullable=False)
     width = Column(Integer, nullable=False)
     passes = Column(Integer, nullable=False)
-    prev_graphs = Column(JSONB, nullable=False)
+    prev_graphs = Column(JSONB, nullable=True)
 
     game_status = relationship("Status", back_populates="game_info", uselist=False)
+    moves = relationship("GameMove", back_populates="game_info", order_by="GameMove.turn")
 
     __table_args__ = (
         CheckConstraint('height >= 3 AND height <= 20', name='check_height_range'),
@@ -50,6 +54,20 @@ class Status(Base):
 
     game_info = relationship("Game", back_populates="game_status")
 
+class GameMove(Base):
+    __tablename__ = "game_moves"
+    __table_args__ = (
+        UniqueConstraint('game_id', 'turn', name='unique_game_turn'),
+    )
+
+    id = Column(BigInteger, primary_key=True, nullable=False)
+    game_id = Column(UUID(as_uuid=True), ForeignKey("games_info.id"), nullable=False)
+    turn = Column(Integer, nullable=False)
+    move = Column(String, nullable=False)
+    diff = Column(BYTEA, nullable=True)
+
+    game_info = relationship("Game", back_populates="moves")
+
 
 
 
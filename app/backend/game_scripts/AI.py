@@ -1,12 +1,12 @@
 import random
-import copy
 import math
-from typing import Literal, Dict, TYPE_CHECKING
+import functools
+from typing import Hashable, Literal, Optional, Union, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from backend.game_scripts import game_state
 
-from backend.game_scripts import player, node
+from backend.game_scripts import player, node, utils, constants, mcts, parallel_mcts, alphabeta, opening_book, pondering, budget
 
 class AI(player.Player):
     """
@@ -20,11 +20,15 @@ class AI(player.Player):
         player (Player): The player instance the AI controls.
         color (str): The color of the AI player.
         difficulty (str): The difficulty level of this AI.
+        last_report (Optional[NamedTuple]): Statistics of the last search, None before the first one.
+        last_usage (Optional[Usage]): Compute the last search used against its budget, None before the first one.
 
     Public Methods:
         AI_move(graph): Chooses and returns a move based on the current difficulty level.
     """
 
+    __slots__ = ("difficulty", "last_report", "last_usage")
+
     def __init__(self, difficulty: Literal["easy", "medium", "hard", "very_hard", "insane"] = "easy", color: str = None, score: int = 0, opponent: str=None) -> None:
         """
         Initializes the AI player with a specific difficulty level.
@@ -38,23 +42,28 @@ class AI(player.Player):
         self.score = score
         self._opponent = opponent
         self.difficulty = difficulty
+        self.last_report = None
+        self.last_usage = None
 
     def to_dict(self):
         return {"color": self.color, "score": self.score, "opponent": self._opponent, "difficulty": self.difficulty}
     
     def from_dict(self, dict_data):
-        self.color = dict_data["color"]
+        self.color = utils.intern_color(dict_data["color"])
         self.score = dict_data["score"]
-        self._opponent = dict_data["opponent"]
+        self._opponent = utils.intern_color(dict_data["opponent"])
         self.difficulty = dict_data["difficulty"]
         return self
     
-    def AI_move(self, copied_game: "game_state.GameState") -> str:
+    def AI_move(self, copied_game: "game_state.GameState", use_book: bool = True, ponder_key: Optional[Hashable] = None) -> str:
         """
-        Chooses a move based on the AI difficulty level.
+        Chooses a move based on the AI difficulty level, from the opening book when the position is in it.
         
         Args:
-            graph (dict): The game board represented as a node graph.
+            copied_game (GameState): The game to choose a move in.
+            use_book (bool, optional): Whether to consult the opening book. Defaults to True.
+            ponder_key (Hashable, optional): Key of the game, such as its ID, under which tree
+                searches keep their trees between moves when pondering is enabled. Defaults to None.
         
         Returns:
             str: The ID of the selected node, or "pass".
@@ -62,8 +71,8 @@ class AI(player.Player):
 
         bot_difficulty_moves = {
         "easy": self._easy_move,
-        "medium": self._medium_move,
-        "hard": self._hard_move,
+        "medium": functools.partial(self._medium_move, ponder_key=ponder_key),
+        "hard": functools.partial(self._hard_move, ponder_key=ponder_key),
         "very_hard": self._very_hard_move,
         "insane": self._insane_move
         }
@@ -73,15 +82,22 @@ class AI(player.Player):
         
         if (copied_game.players[self._opponent].score < self.score and copied_game.passes > 0):
             return "pass"
+
+        book = opening_book.load_book(constants.opening_book_path) if use_book else None
+        if book is not None:
+            move = book.lookup(copied_game, self.difficulty)
+            if move == "pass" or (move is not None and copied_game.valid_placement(move)):
+                return move
         
         return bot_difficulty_moves[self.difficulty](copied_game)  
     
     def _easy_move(self, copied_game: "game_state.GameState") -> str:
         """
-        Selects a random valid move from the available ones (easy AI).
+        Selects a random valid move from the available ones (easy AI), weighted by the score
+        change each move would bring and by the routers next to it.
         
         Args:
-            graph (dict): The game board graph.
+            copied_game (GameState): The game to choose a move in, left unchanged.
         
         Returns:
             str: The ID of the randomly chosen node, or "pass".
@@ -96,28 +112,28 @@ class AI(player.Player):
         considered_moves = []
         ranked_moves = []
         for move in moves:
-            if copied_game.graph[move].controlled == self.color:
+            if copied_game.get_controller(move) == self.color:
                 continue
 
             considered_moves.append(move)
-            curr_game = copy.deepcopy(copied_game)
-            curr_game.place_router(move)
+            delta = copied_game.score_delta(move)
 
-            player_self = curr_game.players[self.color]
+            rank = 5 * (copied_game.height * copied_game.width)
 
-            rank = 5 * (curr_game.height * curr_game.width)
-
-            rank += WEIGHT_SCORE_DIFF * (player_self.score - curr_game.players[player_self.get_opponent()].score)
+            score_self = copied_game.players[self.color].score + delta.scores[self.color]
+            score_opponent = copied_game.players[self.get_opponent()].score + delta.scores[self.get_opponent()]
+            rank += WEIGHT_SCORE_DIFF * (score_self - score_opponent)
 
             y_str, x_str = move.split(".")
 
-            if int(y_str) == curr_game.height - 1 or int(x_str) == curr_game.width - 1:
+            if int(y_str) == copied_game.height - 1 or int(x_str) == copied_game.width - 1:
                 rank += WEIGHT_BORDER
 
-            for nbr in curr_game.graph[move].nbrs:
-                if curr_game.graph[nbr].router_owner == player_self:
+            for nbr in copied_game.get_neighbors(move):
+                nbr_owner = copied_game.get_router_owner(nbr)
+                if nbr_owner == self.color:
                     rank += WEIGHT_NEIGHBOR_OWNED
-                elif curr_game.graph[nbr].router_owner == player_self.get_opponent():
+                elif nbr_owner == self.get_opponent():
                     rank += WEIGHT_NEIGHBOR_ENEMY
 
             ranked_moves.append((rank, move))
@@ -132,67 +148,105 @@ class AI(player.Player):
 
         return random.choices(considered_moves, weights, k=1)[0] if considered_moves else "pass"
 
-    def _medium_move(self, moves) -> str:
+    def _medium_move(self, copied_game: "game_state.GameState", ponder_key: Optional[Hashable] = None) -> str:
         """
-        Medium difficulty move logic placeholder.
-
-        Currently, this method always returns "pass". Intended to implement
-        a basic heuristic strategy for the medium difficulty level.
+        Selects a move with Monte Carlo tree search on the medium budget.
 
         Args:
-            graph (dict): The game board graph.
+            copied_game (GameState): The game to search, left unchanged.
+            ponder_key (Hashable, optional): Key under which the tree is kept for pondering.
 
         Returns:
             str: The move chosen by the medium difficulty AI.
         """
-        
-        return "pass"
-    
-    def _hard_move(self, graph: Dict[str, node.Node]) -> str:
-        """
-        Hard difficulty move logic placeholder.
 
-        Currently, this method always returns "pass". Intended to implement
-        a more advanced strategy involving deeper analysis of the game state.
+        return self._mcts_move(copied_game, ponder_key)
+
+    def _hard_move(self, copied_game: "game_state.GameState", ponder_key: Optional[Hashable] = None) -> str:
+        """
+        Selects a move with Monte Carlo tree search on the hard budget.
 
         Args:
-            graph (dict): The game board graph.
+            copied_game (GameState): The game to search, left unchanged.
+            ponder_key (Hashable, optional): Key under which the tree is kept for pondering.
 
         Returns:
             str: The move chosen by the hard difficulty AI.
         """
-        
-        return "pass"
-    
-    def _very_hard_move(self, graph: Dict[str, node.Node]) -> str:
+
+        return self._mcts_move(copied_game, ponder_key)
+
+    def _mcts_move(self, copied_game: "game_state.GameState", ponder_key: Optional[Hashable] = None) -> str:
         """
-        Very hard difficulty move logic placeholder.
+        Runs a tree search within the difficulty's budget and keeps its statistics.
 
-        Currently, this method always returns "pass". Intended to implement
-        complex strategic decision-making to challenge advanced players.
+        With a ponder key and pondering enabled, the search continues the tree pondered since
+        the AI's previous move when it covers the human's reply, and hands its own tree over
+        for pondering afterwards.
 
         Args:
-            graph (dict): The game board graph.
+            copied_game (GameState): The game to search, left unchanged.
+            ponder_key (Hashable, optional): Key under which the tree is kept for pondering.
 
         Returns:
-            str: The move chosen by the very hard difficulty AI.
+            str: The most visited move.
         """
-         
-        return "pass"
+
+        limits = budget.get_budget(self.difficulty)
+        if ponder_key is None or not pondering.enabled():
+            report = mcts.search(copied_game, limits.nodes, limits.seconds, memory_bytes=limits.memory_bytes)
+        else:
+            ponderer = pondering.get_ponderer()
+            with ponderer.searching():
+                root = ponderer.take(ponder_key, copied_game) or mcts.root_node(copied_game)
+                report = mcts.search(copied_game, limits.nodes, limits.seconds, root=root, memory_bytes=limits.memory_bytes)
+            ponderer.store(ponder_key, copied_game, root, report)
+        return self._record_search(report, report.playouts)
     
-    def _insane_move(self, graph: Dict[str, node.Node]) -> str:
+    def _very_hard_move(self, copied_game: "game_state.GameState") -> str:
         """
-        Insane difficulty move logic placeholder.
+        Selects a move with an iterative-deepening alpha-beta search.
 
-        Currently, this method always returns "pass". Intended to implement
-        the most challenging AI behavior, possibly using machine learning or
-        exhaustive search algorithms.
+        Args:
+            copied_game (GameState): The game to search, left unchanged.
+
+        Returns:
+            str: The move chosen by the very hard difficulty AI.
+        """
+
+        limits = budget.get_budget(self.difficulty)
+        table = alphabeta.TranspositionTable.for_memory(limits.memory_bytes, constants.transposition_entries)
+        report = alphabeta.AlphaBeta(copied_game, table).search(limits.seconds, constants.alphabeta_max_depth, limits.nodes)
+        return self._record_search(report, report.nodes)
+
+    def _insane_move(self, copied_game: "game_state.GameState") -> str:
+        """
+        Selects a move with one Monte Carlo tree search per worker process, merged at the root.
 
         Args:
-            graph (dict): The game board graph.
+            copied_game (GameState): The game to search, left unchanged.
 
         Returns:
             str: The move chosen by the insane difficulty AI.
         """
 
-        return "pass"
\ No newline at end of file
+        limits = budget.get_budget(self.difficulty)
+        report = parallel_mcts.search(copied_game, limits.nodes, limits.seconds, constants.parallel_workers, limits.memory_bytes)
+        return self._record_search(report, report.playouts)
+
+    def _record_search(self, report: Union[mcts.SearchReport, alphabeta.SearchReport], nodes: int) -> str:
+        """
+        Keeps the statistics of a search and adds what it used to the totals of the difficulty.
+
+        Args:
+            report (SearchReport): Report of the search.
+            nodes (int): Playouts or positions the search ran.
+
+        Returns:
+            str: The move chosen by the search.
+        """
+
+        self.last_report = report
+        self.last_usage = budget.Usage(report.seconds, nodes, report.memory_bytes, report.stopped_by)
+        budget.record(self.difficulty, self.last_usage)
+        return report.move
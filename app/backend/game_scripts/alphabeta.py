@@ -0,0 +1,312 @@
+from typing import List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+import time
+
+if TYPE_CHECKING:
+    from backend.game_scripts import game_state
+
+from backend.game_scripts import board, budget
+
+PASS = "pass"
+WIN = 1_000_000.0
+TIME_CHECK_NODES = 256
+# six list slots, plus the key and value objects a filled slot holds
+ENTRY_BYTES = 6 * 8 + 36 + 24
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class SearchReport(NamedTuple):
+    """
+    Outcome and throughput of one alpha-beta search.
+
+    Attributes:
+        move (str): The chosen node ID, or "pass".
+        depth (int): Depth of the deepest completed iteration.
+        nodes (int): Number of positions visited.
+        seconds (float): Wall-clock time spent searching.
+        nodes_per_second (float): Node throughput of the search.
+        tt_hit_rate (float): Share of transposition table probes that found the position.
+        memory_bytes (int): Estimated size of the transposition table.
+        stopped_by (Optional[str]): The budget limit that ended the search, see budget.Usage.
+    """
+
+    move: str
+    depth: int
+    nodes: int
+    seconds: float
+    nodes_per_second: float
+    tt_hit_rate: float
+    memory_bytes: int = 0
+    stopped_by: Optional[str] = None
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time or node budget runs out, to abandon the current iteration.
+    """
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results, indexed by position key modulo the number of slots.
+
+    A slot is replaced when the new result was searched at least as deep as the stored one, or
+    when the stored one comes from an earlier search.
+
+    Args:
+        entries (int): Number of slots.
+
+    Attributes:
+        probes (int): Number of lookups.
+        hits (int): Number of lookups that found the position.
+
+    Public Methods:
+        for_memory(memory_bytes, entries): Creates the largest table within a memory budget.
+        memory_bytes(): Estimates the size of the table when full.
+        new_search(): Marks the stored results as coming from an earlier search.
+        probe(key): Returns the stored result of a position, if any.
+        store(key, depth, value, flag, move): Records the result of a position.
+    """
+
+    __slots__ = ("entries", "keys", "depths", "values", "flags", "moves", "ages", "age", "probes", "hits")
+
+    def __init__(self, entries: int) -> None:
+        self.entries = entries
+        self.keys = [None] * entries
+        self.depths = [0] * entries
+        self.values = [0.0] * entries
+        self.flags = [EXACT] * entries
+        self.moves = [None] * entries
+        self.ages = [0] * entries
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+
+    @classmethod
+    def for_memory(cls, memory_bytes: int, entries: int) -> "TranspositionTable":
+        """
+        Creates a table of at most `entries` slots whose estimated size fits `memory_bytes`.
+
+        Args:
+            memory_bytes (int): Memory budget of the table.
+            entries (int): Largest number of slots.
+
+        Returns:
+            TranspositionTable: The table, with at least one slot.
+        """
+
+        return cls(max(1, min(entries, memory_bytes // ENTRY_BYTES)))
+
+    def memory_bytes(self) -> int:
+        """
+        Estimates the size of the table once every slot is filled.
+
+        Returns:
+            int: Bytes, ENTRY_BYTES per slot.
+        """
+
+        return self.entries * ENTRY_BYTES
+
+    def new_search(self) -> None:
+        """
+        Marks the stored results as coming from an earlier search, so that any of them can be replaced.
+        """
+
+        self.age += 1
+
+    def probe(self, key: int) -> Optional[Tuple[int, float, int, Optional[str]]]:
+        """
+        Returns the stored result of a position.
+
+        Args:
+            key (int): Position key.
+
+        Returns:
+            Optional[tuple[int, float, int, Optional[str]]]: Depth, value, bound flag and best
+            move, or None if the position is not stored.
+        """
+
+        self.probes += 1
+        slot = key % self.entries
+        if self.keys[slot] != key:
+            return None
+        self.hits += 1
+        return self.depths[slot], self.values[slot], self.flags[slot], self.moves[slot]
+
+    def store(self, key: int, depth: int, value: float, flag: int, move: Optional[str]) -> None:
+        """
+        Records the result of a position, unless its slot holds a deeper result of the current search.
+
+        Args:
+            key (int): Position key.
+            depth (int): Remaining depth the position was searched to.
+            value (float): Value for the player to move.
+            flag (int): EXACT, LOWER (value is a lower bound) or UPPER (value is an upper bound).
+            move (Optional[str]): Best move found, if any.
+        """
+
+        slot = key % self.entries
+        if self.keys[slot] is not None and self.ages[slot] == self.age and self.depths[slot] > depth:
+            return
+        self.keys[slot] = key
+        self.depths[slot] = depth
+        self.values[slot] = value
+        self.flags[slot] = flag
+        self.moves[slot] = move
+        self.ages[slot] = self.age
+
+class AlphaBeta:
+    """
+    Iterative-deepening negamax search with alpha-beta pruning and a transposition table.
+
+    Moves are played and undone on the game itself. At every node the table's best move is
+    tried first, then the capturing placements, then the other placements, then passing. The
+    position value is the score difference for the player to move; a finished game is worth
+    WIN plus that difference to its winner.
+
+    Args:
+        game (GameState): The game to search, left unchanged.
+        table (TranspositionTable): Table to read and fill.
+
+    Attributes:
+        nodes (int): Positions visited by the current search.
+        deadline (float): perf_counter() value at which the search stops.
+        max_nodes (float): Node count at which the search stops.
+        root_best (Optional[str]): Best root move so far in the current iteration.
+
+    Public Methods:
+        search(seconds, max_depth, max_nodes): Searches deeper and deeper until the budget runs out.
+    """
+
+    def __init__(self, game: "game_state.GameState", table: TranspositionTable) -> None:
+        self.game = game
+        self.table = table
+        self.nodes = 0
+        self.deadline = 0.0
+        self.max_nodes = float("inf")
+        self.root_best = None
+
+    def search(self, seconds: float, max_depth: int, max_nodes: Optional[int] = None) -> SearchReport:
+        """
+        Runs iterations of depth 1, 2, ... until `max_depth`, the time budget or the node budget is reached.
+
+        An iteration cut short by a budget still counts once it has finished searching the
+        previous best move, which it tries first: any move it found better since is better at
+        the deeper depth too. Depth 1 always completes so there is always a move.
+
+        Args:
+            seconds (float): Wall-clock budget of the search.
+            max_depth (int): Deepest iteration to run.
+            max_nodes (int, optional): Node budget of the search. Defaults to no limit.
+
+        Returns:
+            SearchReport: Best move of the deepest completed iteration and the search statistics.
+        """
+
+        start = time.perf_counter()
+        self.table.new_search()
+        probes, hits = self.table.probes, self.table.hits
+        self.nodes = 0
+
+        best_move, depth_reached, stopped_by = PASS, 0, None
+        for depth in range(1, max_depth + 1):
+            self.deadline = start + seconds if depth > 1 else float("inf")
+            self.max_nodes = max_nodes if depth > 1 and max_nodes is not None else float("inf")
+            self.root_best = None
+            try:
+                _, best_move = self._search_root(depth, best_move)
+            except SearchTimeout:
+                stopped_by = budget.NODES if self.nodes >= self.max_nodes else budget.SECONDS
+                best_move = self.root_best or best_move
+                break
+            depth_reached = depth
+            if time.perf_counter() - start >= seconds:
+                stopped_by = budget.SECONDS
+                break
+            if max_nodes is not None and self.nodes >= max_nodes:
+                stopped_by = budget.NODES
+                break
+
+        elapsed = time.perf_counter() - start
+        probes, hits = self.table.probes - probes, self.table.hits - hits
+        return SearchReport(best_move, depth_reached, self.nodes, elapsed, self.nodes / elapsed if elapsed else 0.0, hits / probes if probes else 0.0, self.table.memory_bytes(), stopped_by)
+
+    def _key(self) -> int:
+        game = self.game
+        return (game.board.hash << 4) | (board.CODES[game.get_player_turn().color] << 2) | min(game.passes, 3)
+
+    def _evaluate(self) -> float:
+        game = self.game
+        current = game.get_player_turn()
+        diff = current.score - game.players[current.get_opponent()].score
+        if game.passes >= 2 and diff:
+            return WIN + diff if diff > 0 else diff - WIN
+        return diff
+
+    def _ordered_moves(self, first: Optional[str]) -> List[str]:
+        game = self.game
+        ids = game.board.ids
+        legal = game.legal_moves_mask()
+        captures = game.capturing_moves_mask() & legal
+        moves = [ids[idx] for idx in board.iter_bits(captures)]
+        moves += [ids[idx] for idx in board.iter_bits(legal & ~captures)]
+        moves.append(PASS)
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def _search_root(self, depth: int, previous_best: str) -> Tuple[float, str]:
+        game = self.game
+        self.nodes += 1
+        alpha, best_move = -float("inf"), previous_best
+        for move in self._ordered_moves(previous_best):
+            game.play(move)
+            try:
+                value = -self._negamax(depth - 1, -float("inf"), -alpha)
+            finally:
+                game.undo()
+            if value > alpha:
+                alpha, best_move = value, move
+            self.root_best = best_move
+        self.table.store(self._key(), depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _negamax(self, depth: int, alpha: float, beta: float) -> float:
+        self.nodes += 1
+        if self.nodes >= self.max_nodes or (self.nodes % TIME_CHECK_NODES == 0 and time.perf_counter() > self.deadline):
+            raise SearchTimeout()
+
+        game = self.game
+        if depth == 0 or game.passes >= 2:
+            return self._evaluate()
+
+        key = self._key()
+        entry = self.table.probe(key)
+        first = None
+        if entry is not None:
+            stored_depth, value, flag, first = entry
+            if stored_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        original_alpha = alpha
+        best_value, best_move = -float("inf"), None
+        for move in self._ordered_moves(first):
+            game.play(move)
+            try:
+                value = -self._negamax(depth - 1, -beta, -alpha)
+            finally:
+                game.undo()
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        flag = UPPER if best_value <= original_alpha else LOWER if best_value >= beta else EXACT
+        self.table.store(key, depth, best_value, flag, best_move)
+        return best_value
@@ -0,0 +1,238 @@
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from backend.game_scripts import constants
+from backend.game_scripts.board import Board, EMPTY, iter_bits
+
+class BitMasks:
+    """
+    Edge masks of a board shape, used to shift whole bitboards by one cell without wrapping.
+
+    Args:
+        height (int): Number of rows.
+        width (int): Number of columns.
+
+    Attributes:
+        width (int): Number of columns, the shift for vertical neighbors.
+        full (int): Mask with one bit set per cell.
+        not_first_col (int): Mask of every cell outside the first column.
+        not_last_col (int): Mask of every cell outside the last column.
+    """
+
+    __slots__ = ("width", "full", "not_first_col", "not_last_col")
+
+    def __init__(self, height: int, width: int) -> None:
+        self.width = width
+        self.full = (1 << (height * width)) - 1
+        first_col = sum(1 << (row * width) for row in range(height))
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~(first_col << (width - 1))
+
+    def expand(self, mask: int) -> int:
+        """
+        Returns every cell orthogonally adjacent to a cell of the mask.
+
+        Args:
+            mask (int): Cells to expand.
+
+        Returns:
+            int: Mask of the neighboring cells.
+        """
+
+        width = self.width
+        return (((mask << 1) & self.not_first_col) | ((mask >> 1) & self.not_last_col) | (mask << width) | (mask >> width)) & self.full
+
+@lru_cache(maxsize=None)
+def get_masks(height: int, width: int) -> BitMasks:
+    """
+    Returns the shared edge masks for a board shape, building them on first use.
+
+    Args:
+        height (int): Number of rows.
+        width (int): Number of columns.
+
+    Returns:
+        BitMasks: The cached masks.
+    """
+
+    return BitMasks(height, width)
+
+class BitBoard(Board):
+    """
+    Board backend that keeps each color's routers as an arbitrary-precision int bitmask.
+
+    Bit i of a mask is cell i (row * width + col). Liberty checks, group collection and territory
+    flood fills run as shift/AND/OR loops over whole masks instead of per-cell traversal. The
+    owner and control byte arrays are still maintained for point lookups, so the board can be
+    used anywhere a Board is.
+
+    Args:
+        height (int): Number of rows.
+        width (int): Number of columns.
+
+    Attributes:
+        masks (BitMasks): Shared edge masks of the board shape.
+        routers (list[int]): Router bitmask of each color code; index EMPTY is unused.
+        territory (list[int]): Controlled-cell bitmask of each color code; index EMPTY is unused.
+    """
+
+    __slots__ = ("masks", "routers", "territory")
+
+    def __init__(self, height: int = 5, width: int = 5) -> None:
+        super().__init__(height, width)
+        self.masks = get_masks(height, width)
+        self.routers = [0] * (len(constants.colors) + 1)
+        self.territory = [0] * (len(constants.colors) + 1)
+
+    def copy(self) -> "BitBoard":
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.topology = self.topology
+        new_board.owner = self.owner[:]
+        new_board.control = self.control[:]
+        new_board.hash = self.hash
+        new_board.journal = None
+        new_board._group = self._group
+        new_board._stones = self._stones
+        new_board._libs = self._libs
+        new_board.masks = self.masks
+        new_board.routers = self.routers[:]
+        new_board.territory = self.territory[:]
+        return new_board
+
+    def capture(self, idx: int, code: int, router_bool: bool = False) -> None:
+        super().capture(idx, code, router_bool)
+        self.territory[code] |= 1 << idx
+
+    def uncapture(self, idx: int) -> None:
+        code = self.control[idx]
+        super().uncapture(idx)
+        self.territory[code] &= ~(1 << idx)
+
+    def destroy(self, idx: int) -> None:
+        code = self.control[idx]
+        super().destroy(idx)
+        self.territory[code] &= ~(1 << idx)
+
+    def rollback(self, mark: int, position_hash: int) -> None:
+        journal, owner, control, routers, territory = self.journal, self.owner, self.control, self.routers, self.territory
+        while len(journal) > mark:
+            idx, prev_owner, prev_control = journal.pop()
+            bit = 1 << idx
+            if owner[idx] != prev_owner:
+                routers[owner[idx]] &= ~bit
+                routers[prev_owner] |= bit
+            if control[idx] != prev_control:
+                territory[control[idx]] &= ~bit
+                territory[prev_control] |= bit
+            owner[idx] = prev_owner
+            control[idx] = prev_control
+        routers[EMPTY] = territory[EMPTY] = 0
+        self.hash = position_hash
+
+    def rebuild_groups(self) -> None:
+        self.routers = [0] * (len(constants.colors) + 1)
+        self.territory = [0] * (len(constants.colors) + 1)
+        for idx in range(self.topology.size):
+            self.routers[self.owner[idx]] |= 1 << idx
+            self.territory[self.control[idx]] |= 1 << idx
+        self.routers[EMPTY] = self.territory[EMPTY] = 0
+
+    def _add_router(self, idx: int, code: int) -> None:
+        self.routers[code] |= 1 << idx
+
+    def _remove_router(self, idx: int, code: int) -> None:
+        self.routers[code] &= ~(1 << idx)
+
+    def _empty(self) -> int:
+        occupied = 0
+        for mask in self.routers:
+            occupied |= mask
+        return self.masks.full & ~occupied
+
+    def _flood(self, seed: int, allowed: int) -> int:
+        expand = self.masks.expand
+        region = frontier = seed
+        while frontier:
+            frontier = expand(frontier) & allowed & ~region
+            region |= frontier
+        return region
+
+    def has_liberties(self, start: int, code: int, excluded: Iterable[int] = ()) -> bool:
+        expand = self.masks.expand
+        visited = 1 << start
+        for idx in excluded:
+            visited |= 1 << idx
+        allowed = self.routers[code] & ~visited
+        free = self._empty() & ~visited
+
+        region = frontier = 1 << start
+        while frontier:
+            grown = expand(frontier)
+            if grown & free:
+                return True
+            frontier = grown & allowed & ~region
+            region |= frontier
+        return False
+
+    def move_analysis(self, code: int, opponent: int, cells: Optional[int] = None) -> Tuple[int, int]:
+        expand = self.masks.expand
+        empty = self._empty()
+        playable = expand(empty) & empty
+        captures = 0
+
+        remaining = self.routers[code]
+        while remaining:
+            group = self._flood(remaining & -remaining, self.routers[code])
+            remaining &= ~group
+            liberties = expand(group) & empty
+            if liberties & (liberties - 1):
+                playable |= liberties
+
+        remaining = self.routers[opponent]
+        while remaining:
+            group = self._flood(remaining & -remaining, self.routers[opponent])
+            remaining &= ~group
+            liberties = expand(group) & empty
+            if liberties and not liberties & (liberties - 1):
+                captures |= liberties
+        playable |= captures
+        if cells is not None:
+            playable &= cells
+            captures &= cells
+            empty &= cells
+
+        for idx in iter_bits(empty & ~playable):
+            if self._starves_neighbor(idx, opponent):
+                playable |= 1 << idx
+        return playable, captures
+
+    def affected_cells(self, changed: Iterable[int]) -> int:
+        expand = self.masks.expand
+        changed_mask = 0
+        for idx in changed:
+            changed_mask |= 1 << idx
+        near = changed_mask | expand(changed_mask)
+
+        empty, liberties, starved = self._empty(), 0, 0
+        for code, routers in enumerate(self.routers):
+            touched = near & routers if code else 0
+            while touched:
+                group = self._flood(touched & -touched, routers)
+                touched &= ~group
+                group_liberties = expand(group) & empty
+                liberties |= group_liberties
+                if not group_liberties & ~changed_mask:
+                    starved |= group
+        starved |= expand(starved)
+
+        affected = near | liberties | starved
+        return affected | expand(affected)
+
+    def group_cells(self, start: int) -> List[int]:
+        return list(iter_bits(self._flood(1 << start, self.routers[self.owner[start]])))
+
+    def flood_region(self, start: int) -> Tuple[List[int], set]:
+        region = self._flood(1 << start, self._empty())
+        border = self.masks.expand(region) & ~region
+        routers_owners_found = {code for code, mask in enumerate(self.routers) if code and mask & border}
+        return list(iter_bits(region)), routers_owners_found
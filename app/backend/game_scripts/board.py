@@ -0,0 +1,656 @@
+from functools import lru_cache
+from typing import Dict, Tuple, List, Iterable, Iterator, Optional, Set
+from collections import deque
+import random
+
+from backend.game_scripts import constants
+
+EMPTY = 0
+ROUTER_SHIFT = 32
+CODES = {color: code for code, color in enumerate(constants.colors, start=1)}
+COLORS = (None, *constants.colors)
+
+class Topology:
+    """
+    Immutable description of a rectangular board shape, shared by every board of that shape.
+
+    Args:
+        height (int): Number of rows.
+        width (int): Number of columns.
+
+    Attributes:
+        height (int): Number of rows.
+        width (int): Number of columns.
+        size (int): Number of cells (height * width).
+        ids (tuple[str, ...]): Node ID ("row.col") of every cell, indexed by row * width + col.
+        index (dict[str, int]): Reverse lookup from node ID to cell index.
+        nbrs (tuple[tuple[int, ...], ...]): Neighbor cell indices of every cell.
+        nbr_ids (tuple[tuple[str, ...], ...]): Neighbor node IDs of every cell.
+        router_keys (tuple[tuple[int, ...], ...]): Zobrist key for each cell and router color code, in the high 32 bits.
+        control_keys (tuple[tuple[int, ...], ...]): Zobrist key for each cell and controller color code, in the low 32 bits.
+
+    Keeping router and control keys in separate halves of the 64-bit position hash means
+    `hash >> ROUTER_SHIFT` identifies the router layout alone.
+    """
+
+    __slots__ = ("height", "width", "size", "ids", "index", "nbrs", "nbr_ids", "router_keys", "control_keys")
+
+    def __init__(self, height: int, width: int) -> None:
+        self.height = height
+        self.width = width
+        self.size = height * width
+        self.ids = tuple(f"{row}.{col}" for row in range(height) for col in range(width))
+        self.index = {node_id: idx for idx, node_id in enumerate(self.ids)}
+
+        directions = ((1,0), (-1,0), (0,1), (0,-1))
+        nbrs = []
+        for row in range(height):
+            for col in range(width):
+                cell_nbrs = []
+                for d_row, d_col in directions:
+                    nbr_row, nbr_col = d_row + row, d_col + col
+                    if 0 <= nbr_row < height and 0 <= nbr_col < width:
+                        cell_nbrs.append(nbr_row * width + nbr_col)
+                nbrs.append(tuple(cell_nbrs))
+        self.nbrs = tuple(nbrs)
+        self.nbr_ids = tuple(tuple(self.ids[nbr] for nbr in cell_nbrs) for cell_nbrs in self.nbrs)
+
+        # Seeded by shape so position hashes stay stable across processes and restarts
+        rng = random.Random(f"zobrist-{height}x{width}")
+        self.router_keys = tuple((0, *(rng.getrandbits(32) << ROUTER_SHIFT for _ in constants.colors)) for _ in range(self.size))
+        self.control_keys = tuple((0, *(rng.getrandbits(32) for _ in constants.colors)) for _ in range(self.size))
+
+@lru_cache(maxsize=None)
+def get_topology(height: int, width: int) -> Topology:
+    """
+    Returns the shared topology for a board shape, building it on first use.
+
+    Args:
+        height (int): Number of rows.
+        width (int): Number of columns.
+
+    Returns:
+        Topology: The cached topology.
+    """
+
+    return Topology(height, width)
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """
+    Yields the cell index of every set bit, lowest first.
+
+    Args:
+        mask (int): Bitmask of cells.
+
+    Yields:
+        int: Cell index.
+    """
+
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def _has_liberty_outside(libs: Set[int], visited: Set[int]) -> bool:
+    return len(libs) > sum(1 for idx in visited if idx in libs)
+
+class Board:
+    """
+    Compact board storage: router ownership and territory control as flat byte arrays.
+
+    Cells are indexed by row * width + col and hold EMPTY or a color code from CODES.
+
+    Args:
+        height (int): Number of rows.
+        width (int): Number of columns.
+
+    Attributes:
+        topology (Topology): Shared shape information (IDs and neighbor table).
+        owner (bytearray): Color code of the router on each cell, EMPTY if none.
+        control (bytearray): Color code of the controller of each cell, EMPTY if none.
+        hash (int): 64-bit Zobrist hash of the position, kept up to date by every mutation.
+        journal (Optional[list[tuple[int, int, int]]]): Previous (idx, owner, control) of every mutated cell while recording, else None.
+        group (list[int]): Root cell of the router group holding each cell, -1 for cells without a router.
+        stones (dict[int, set[int]]): Cells of every router group, keyed by root.
+        libs (dict[int, set[int]]): Router-free cells adjacent to every router group, keyed by root.
+            The three group tables are recomputed on first use after rebuild_groups().
+
+    Public Methods:
+        capture(idx, code, router_bool=False): Control a cell for a color, optionally placing a router.
+        uncapture(idx): Remove control of a cell.
+        destroy(idx): Remove both the router and the control of a cell.
+        from_cells(height, width, owner, control, position_hash=None): Builds a board from per-cell codes.
+        copy(): Returns an independent board sharing the same topology.
+        snapshot(): Captures the cell state as immutable bytes.
+        restore(snapshot): Puts the board back into a captured state.
+        rehash(): Recomputes the position hash after the arrays were written directly.
+        apply_cells(cells): Writes final (idx, owner, control) states of cells, keeping the hash up to date.
+        rollback(mark, position_hash): Reverts every journaled mutation made after the journal had `mark` entries.
+        rebuild_groups(): Schedules every router group for recomputation after the arrays were written directly.
+        has_liberties(start, code, excluded=()): Whether the routers of `code` reachable from a cell touch a free cell.
+        group_cells(start): Cells of the router group containing a cell.
+        flood_region(start): Router-free region containing a cell and the router colors bordering it.
+        move_analysis(code, opponent): Cells where `code` may place by the liberty rule, and those that capture.
+    """
+
+    __slots__ = ("topology", "owner", "control", "hash", "journal", "_group", "_stones", "_libs")
+
+    def __init__(self, height: int = 5, width: int = 5) -> None:
+        self.topology = get_topology(height, width)
+        self.owner = bytearray(self.topology.size)
+        self.control = bytearray(self.topology.size)
+        self.hash = 0
+        self.journal = None
+        self._group = [-1] * self.topology.size
+        self._stones = {}
+        self._libs = {}
+
+    @property
+    def group(self) -> List[int]:
+        if self._group is None:
+            self._build_groups()
+        return self._group
+
+    @property
+    def stones(self) -> Dict[int, Set[int]]:
+        if self._group is None:
+            self._build_groups()
+        return self._stones
+
+    @property
+    def libs(self) -> Dict[int, Set[int]]:
+        if self._group is None:
+            self._build_groups()
+        return self._libs
+
+    @property
+    def height(self) -> int:
+        return self.topology.height
+
+    @property
+    def width(self) -> int:
+        return self.topology.width
+
+    @property
+    def size(self) -> int:
+        return self.topology.size
+
+    @property
+    def nbrs(self) -> Tuple[Tuple[int, ...], ...]:
+        return self.topology.nbrs
+
+    @property
+    def ids(self) -> Tuple[str, ...]:
+        return self.topology.ids
+
+    @property
+    def index(self) -> Dict[str, int]:
+        return self.topology.index
+
+    @classmethod
+    def from_cells(cls, height: int, width: int, owner: Iterable[int], control: Iterable[int], position_hash: Optional[int] = None) -> "Board":
+        """
+        Builds a board from per-cell router owner and controller codes.
+
+        Args:
+            height (int): Number of rows.
+            width (int): Number of columns.
+            owner (Iterable[int]): Router owner code of every cell, in index order.
+            control (Iterable[int]): Controller code of every cell, in index order.
+            position_hash (int, optional): Known hash of the cells, such as a stored one. Computed if omitted.
+
+        Returns:
+            Board: The board, with its hash set and its groups built on first use.
+        """
+
+        new_board = cls(height, width)
+        new_board.owner[:] = bytes(owner)
+        new_board.control[:] = bytes(control)
+        if position_hash is None:
+            new_board.rehash()
+        else:
+            new_board.hash = position_hash
+        new_board.rebuild_groups()
+        return new_board
+
+    def copy(self) -> "Board":
+        new_board = Board.__new__(Board)
+        new_board.topology = self.topology
+        new_board.owner = self.owner[:]
+        new_board.control = self.control[:]
+        new_board.hash = self.hash
+        new_board.journal = None
+        if self._group is None:
+            new_board._group = new_board._stones = new_board._libs = None
+        else:
+            new_board._group = self._group[:]
+            new_board._stones = {root: stones.copy() for root, stones in self._stones.items()}
+            new_board._libs = {root: libs.copy() for root, libs in self._libs.items()}
+        return new_board
+
+    def snapshot(self) -> Tuple[bytes, bytes, int]:
+        """
+        Captures the cell state of the board. Costs one copy of each cell array.
+
+        Returns:
+            tuple[bytes, bytes, int]: Router owners, controllers and position hash.
+        """
+
+        return bytes(self.owner), bytes(self.control), self.hash
+
+    def restore(self, snapshot: Tuple[bytes, bytes, int]) -> None:
+        """
+        Puts the board back into a state captured by snapshot() and stops journaling.
+
+        Args:
+            snapshot (tuple[bytes, bytes, int]): Value returned by snapshot() on a board of the same shape.
+        """
+
+        owner, control, position_hash = snapshot
+        self.owner[:] = owner
+        self.control[:] = control
+        self.hash = position_hash
+        self.journal = None
+        self.rebuild_groups()
+
+    def rehash(self) -> int:
+        """
+        Recomputes the Zobrist hash from the owner and control arrays.
+
+        Returns:
+            int: The new position hash.
+        """
+
+        router_keys, control_keys = self.topology.router_keys, self.topology.control_keys
+        position_hash = 0
+        for idx in range(self.topology.size):
+            position_hash ^= router_keys[idx][self.owner[idx]] ^ control_keys[idx][self.control[idx]]
+        self.hash = position_hash
+        return position_hash
+
+    def apply_cells(self, cells: Iterable[Tuple[int, int, int]]) -> None:
+        """
+        Writes the final states of some cells, such as a stored move diff, and schedules the
+        groups for recomputation.
+
+        Args:
+            cells (Iterable[tuple[int, int, int]]): (idx, owner, control) of every changed cell.
+        """
+
+        router_keys, control_keys = self.topology.router_keys, self.topology.control_keys
+        owner, control = self.owner, self.control
+        for idx, new_owner, new_control in cells:
+            self.hash ^= router_keys[idx][owner[idx]] ^ control_keys[idx][control[idx]] ^ router_keys[idx][new_owner] ^ control_keys[idx][new_control]
+            owner[idx] = new_owner
+            control[idx] = new_control
+        self.rebuild_groups()
+
+    def rollback(self, mark: int, position_hash: int) -> None:
+        """
+        Reverts journaled cell mutations in reverse order until the journal is back to `mark` entries.
+
+        Args:
+            mark (int): Journal length to roll back to.
+            position_hash (int): Position hash at the time the journal had `mark` entries.
+        """
+
+        journal, owner, control, nbrs = self.journal, self.owner, self.control, self.topology.nbrs
+
+        # Groups only depend on router ownership, so only groups around cells whose owner changes need rebuilding
+        moved = {idx for idx, prev_owner, _ in journal[mark:] if owner[idx] != prev_owner}
+        region = set(moved)
+        for idx in moved:
+            region.update(nbrs[idx])
+        for idx in list(region):
+            if owner[idx]:
+                region.update(self._drop_group(self.group[idx]))
+
+        while len(journal) > mark:
+            idx, prev_owner, prev_control = journal.pop()
+            owner[idx] = prev_owner
+            control[idx] = prev_control
+        self.hash = position_hash
+
+        for idx in region:
+            if owner[idx] and self.group[idx] == -1:
+                self._build_group(idx)
+
+    def has_liberties(self, start: int, code: int, excluded: Iterable[int] = ()) -> bool:
+        """
+        Checks whether the routers of `code` connected to a start cell have a router-free neighbor.
+
+        The start cell itself is part of the search whatever its owner, and neither it
+        nor the excluded cells count as liberties.
+
+        Args:
+            start (int): Cell index to search from.
+            code (int): Color code of the group owner.
+            excluded (Iterable[int], optional): Cell indices that do not count as liberties.
+
+        Returns:
+            bool: True if a liberty was found, False otherwise.
+        """
+
+        owner, group, libs = self.owner, self.group, self.libs
+        if any(owner[idx] == code for idx in excluded):
+            # Excluded routers split their group, which the tracked groups can not express
+            return self._search_liberties(start, code, excluded)
+
+        visited = {start}
+        visited.update(excluded)
+        if owner[start] == code:
+            return _has_liberty_outside(libs[group[start]], visited)
+
+        for nbr in self.topology.nbrs[start]:
+            if nbr not in visited:
+                nbr_owner = owner[nbr]
+                if not nbr_owner:
+                    return True
+                if nbr_owner == code and _has_liberty_outside(libs[group[nbr]], visited):
+                    return True
+        return False
+
+    def _search_liberties(self, start: int, code: int, excluded: Iterable[int] = ()) -> bool:
+        owner, nbrs = self.owner, self.topology.nbrs
+        visited = {start}
+        visited.update(excluded)
+        queue = deque([start])
+        while queue:
+            curr = queue.popleft()
+            for nbr in nbrs[curr]:
+                if nbr not in visited:
+                    nbr_owner = owner[nbr]
+                    if nbr_owner == code:
+                        queue.append(nbr)
+                        visited.add(nbr)
+                    elif not nbr_owner:
+                        return True
+        return False
+
+    def move_analysis(self, code: int, opponent: int, cells: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Applies the liberty rule of a placement to every cell in one pass.
+
+        A free cell is playable if it touches a free cell, touches a `code` group with another
+        liberty, or leaves a neighboring group without liberties. Repetition is not checked.
+
+        Args:
+            code (int): Color code of the player to move.
+            opponent (int): Color code of the other player.
+            cells (int, optional): Bitmask of the cells to analyse. Defaults to the whole board.
+
+        Returns:
+            tuple[int, int]: Bitmask of the playable cells, and bitmask of the cells whose
+            placement captures at least one `opponent` group, both limited to `cells`.
+        """
+
+        owner, group, libs, nbrs = self.owner, self.group, self.libs, self.topology.nbrs
+        playable = captures = 0
+        for idx in (range(self.topology.size) if cells is None else iter_bits(cells)):
+            if owner[idx]:
+                continue
+            breathes = capturing = False
+            for nbr in nbrs[idx]:
+                nbr_owner = owner[nbr]
+                if not nbr_owner:
+                    breathes = True
+                elif nbr_owner == code:
+                    # idx is one of the group's liberties, so it needs one more
+                    if len(libs[group[nbr]]) > 1:
+                        breathes = True
+                elif nbr_owner == opponent and len(libs[group[nbr]]) == 1:
+                    capturing = True
+            if capturing:
+                captures |= 1 << idx
+                playable |= 1 << idx
+            elif breathes or self._starves_neighbor(idx, opponent):
+                playable |= 1 << idx
+        return playable, captures
+
+    def _starves_neighbor(self, idx: int, opponent: int) -> bool:
+        owner = self.owner
+        return any(owner[nbr] != opponent and not self.has_liberties(nbr, opponent, (idx,)) for nbr in self.topology.nbrs[idx])
+
+    def affected_cells(self, changed: Iterable[int]) -> int:
+        """
+        Returns the cells whose move_analysis() result may differ after the owner of some cells changed.
+
+        The result of a cell depends on the owners within two steps of it and on the liberties of
+        the groups within two steps of it. This covers two steps around the changed cells, the
+        liberties of every group touching them and one step around those liberties. A touching
+        group left without liberties outside the changed cells also gets two steps around its
+        routers, as the capture rule reaches every cell next to one of its neighbors.
+
+        Args:
+            changed (Iterable[int]): Cells whose owner changed, read against the current board.
+
+        Returns:
+            int: Bitmask of the cells to analyse again.
+        """
+
+        nbrs, group, libs, stones = self.topology.nbrs, self.group, self.libs, self.stones
+        changed = set(changed)
+        near = set(changed)
+        for idx in changed:
+            near.update(nbrs[idx])
+
+        liberties, starved = set(), set()
+        for root in {group[idx] for idx in near if group[idx] >= 0}:
+            liberties |= libs[root]
+            if libs[root] <= changed:
+                starved |= stones[root]
+        for idx in list(starved):
+            starved.update(nbrs[idx])
+
+        affected = 0
+        for idx in near | liberties | starved:
+            affected |= 1 << idx
+            for nbr in nbrs[idx]:
+                affected |= 1 << nbr
+        return affected
+
+    def group_cells(self, start: int) -> List[int]:
+        """
+        Returns the cells of the router group containing a cell.
+
+        Args:
+            start (int): Index of a cell holding a router.
+
+        Returns:
+            list[int]: Cell indices of the group, safe to iterate while mutating the board.
+        """
+
+        return list(self.stones[self.group[start]])
+
+    def flood_region(self, start: int) -> Tuple[Set[int], Set[int]]:
+        """
+        Collects the router-free region containing a cell and the colors of the routers around it.
+
+        Args:
+            start (int): Cell index to flood from.
+
+        Returns:
+            tuple[set[int], set[int]]: Cells of the region, and the color codes of the bordering routers.
+        """
+
+        owner, nbrs = self.owner, self.topology.nbrs
+        queue = deque([start])
+        visited = {start}
+        routers_owners_found = set()
+        while queue:
+            curr = queue.popleft()
+            for nbr in nbrs[curr]:
+                if nbr not in visited:
+                    if owner[nbr]:
+                        routers_owners_found.add(owner[nbr])
+                    else:
+                        visited.add(nbr)
+                        queue.append(nbr)
+        return visited, routers_owners_found
+
+    def rebuild_groups(self) -> None:
+        """
+        Drops every router group, to be recomputed from the owner array when next needed.
+
+        Restoring a stored game does not pay for the groups until a move is analysed or played.
+        """
+
+        self._group = self._stones = self._libs = None
+
+    def _build_groups(self) -> None:
+        owner, nbrs, size = self.owner, self.topology.nbrs, self.topology.size
+        group = [-1] * size
+        all_stones, all_libs = {}, {}
+        for root in range(size):
+            code = owner[root]
+            if not code or group[root] != -1:
+                continue
+            group[root] = root
+            stones, libs = [root], set()
+            # The list grows while it is walked, which visits every stone once
+            for curr in stones:
+                for nbr in nbrs[curr]:
+                    nbr_owner = owner[nbr]
+                    if nbr_owner == code:
+                        if group[nbr] == -1:
+                            group[nbr] = root
+                            stones.append(nbr)
+                    elif not nbr_owner:
+                        libs.add(nbr)
+            all_stones[root] = set(stones)
+            all_libs[root] = libs
+        self._group, self._stones, self._libs = group, all_stones, all_libs
+
+    def _build_group(self, root: int) -> None:
+        owner, group, nbrs = self.owner, self.group, self.topology.nbrs
+        code = owner[root]
+        stones = {root}
+        libs = set()
+        stack = [root]
+        while stack:
+            curr = stack.pop()
+            group[curr] = root
+            for nbr in nbrs[curr]:
+                if owner[nbr] == code:
+                    if nbr not in stones:
+                        stones.add(nbr)
+                        stack.append(nbr)
+                elif not owner[nbr]:
+                    libs.add(nbr)
+        self.stones[root] = stones
+        self.libs[root] = libs
+
+    def _drop_group(self, root: int) -> set:
+        if root == -1:
+            return set()
+        stones = self.stones.pop(root)
+        del self.libs[root]
+        for stone in stones:
+            self.group[stone] = -1
+        return stones
+
+    def _add_router(self, idx: int, code: int) -> None:
+        owner, group, nbrs = self.owner, self.group, self.topology.nbrs
+        libs = set()
+        group[idx] = idx
+        self.stones[idx] = {idx}
+        self.libs[idx] = libs
+        for nbr in nbrs[idx]:
+            if not owner[nbr]:
+                libs.add(nbr)
+            else:
+                self.libs[group[nbr]].discard(idx)
+
+        root = idx
+        for nbr in nbrs[idx]:
+            if owner[nbr] == code and group[nbr] != root:
+                root = self._merge(root, group[nbr])
+
+    def _merge(self, root: int, other: int) -> int:
+        if len(self.stones[root]) < len(self.stones[other]):
+            root, other = other, root
+        absorbed = self.stones.pop(other)
+        for stone in absorbed:
+            self.group[stone] = root
+        self.stones[root] |= absorbed
+        self.libs[root] |= self.libs.pop(other)
+        return root
+
+    def _remove_router(self, idx: int, code: int) -> None:
+        owner, group, nbrs = self.owner, self.group, self.topology.nbrs
+        root = group[idx]
+        group[idx] = -1
+        stones = self.stones[root]
+        stones.discard(idx)
+        if not stones:
+            del self.stones[root]
+            del self.libs[root]
+        for nbr in nbrs[idx]:
+            if owner[nbr] and group[nbr] != root:
+                self.libs[group[nbr]].add(idx)
+
+    def capture(self, idx: int, code: int, router_bool: bool = False) -> None:
+        """
+        Captures a cell for the given color.
+
+        Args:
+            idx (int): Cell index.
+            code (int): Color code of the capturing player.
+            router_bool (bool, optional): Whether the capture includes placing a router. Defaults to False.
+        """
+
+        if self.control[idx]:
+            raise ValueError(f"Cannot capture node '{self.topology.ids[idx]}' because it is already controlled by {COLORS[self.control[idx]]}.")
+
+        if self.journal is not None:
+            self.journal.append((idx, self.owner[idx], self.control[idx]))
+
+        if router_bool:
+            if self._group is None:
+                # Groups built lazily must see the owners from before the change
+                self._build_groups()
+            self.owner[idx] = code
+            self.hash ^= self.topology.router_keys[idx][code]
+            self._add_router(idx, code)
+        self.control[idx] = code
+        self.hash ^= self.topology.control_keys[idx][code]
+
+    def uncapture(self, idx: int) -> None:
+        """
+        Removes control of a cell from its current controller.
+
+        Args:
+            idx (int): Cell index.
+        """
+
+        if not self.control[idx]:
+            raise ValueError(f"Cannot uncapture node '{self.topology.ids[idx]}' because it is not controlled.")
+
+        if self.journal is not None:
+            self.journal.append((idx, self.owner[idx], self.control[idx]))
+
+        self.hash ^= self.topology.control_keys[idx][self.control[idx]]
+        self.control[idx] = EMPTY
+
+    def destroy(self, idx: int) -> None:
+        """
+        Removes the router and the control of a cell.
+
+        Args:
+            idx (int): Cell index.
+        """
+
+        if not self.control[idx]:
+            raise ValueError(f"Cannot destroy node '{self.topology.ids[idx]}' because it is not controlled.")
+
+        if self.journal is not None:
+            self.journal.append((idx, self.owner[idx], self.control[idx]))
+
+        self.hash ^= self.topology.control_keys[idx][self.control[idx]] ^ self.topology.router_keys[idx][self.owner[idx]]
+        prev_owner = self.owner[idx]
+        if prev_owner and self._group is None:
+            self._build_groups()
+        self.control[idx] = EMPTY
+        self.owner[idx] = EMPTY
+        if prev_owner:
+            self._remove_router(idx, prev_owner)
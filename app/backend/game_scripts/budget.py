@@ -0,0 +1,98 @@
+from typing import Dict, NamedTuple, Optional
+import threading
+
+from backend.game_scripts import constants
+
+SECONDS, NODES, MEMORY = "seconds", "nodes", "memory"
+
+_stats: Dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+class Budget(NamedTuple):
+    """
+    Most compute one AI move may use.
+
+    Attributes:
+        seconds (float): Wall-clock time of the search.
+        nodes (int): Playouts for tree searches, positions for alpha-beta.
+        memory_bytes (int): Estimated size of the search tree or transposition table.
+    """
+
+    seconds: float
+    nodes: int
+    memory_bytes: int
+
+class Usage(NamedTuple):
+    """
+    Compute one AI move actually used.
+
+    Attributes:
+        seconds (float): Wall-clock time of the search.
+        nodes (int): Playouts or positions searched.
+        memory_bytes (int): Estimated size of the search tree or transposition table.
+        stopped_by (Optional[str]): SECONDS, NODES or MEMORY for the limit that ended the
+            search, None if it ran out of work first.
+    """
+
+    seconds: float
+    nodes: int
+    memory_bytes: int
+    stopped_by: Optional[str]
+
+def get_budget(difficulty: str) -> Budget:
+    """
+    Returns the configured budget of a search difficulty.
+
+    Args:
+        difficulty (str): "medium", "hard", "very_hard" or "insane".
+
+    Returns:
+        Budget: The budget from constants.move_budgets.
+    """
+
+    if difficulty not in constants.move_budgets:
+        raise ValueError(f"No move budget for difficulty '{difficulty}'. Choose from: {', '.join(constants.move_budgets)}.")
+    fields = constants.move_budgets[difficulty]
+    return Budget(fields["seconds"], fields["nodes"], int(fields["memory_mb"] * (1 << 20)))
+
+def record(difficulty: str, usage: Usage) -> None:
+    """
+    Adds the usage of one move to the totals of its difficulty.
+
+    Args:
+        difficulty (str): Difficulty that made the move.
+        usage (Usage): What the move used.
+    """
+
+    with _stats_lock:
+        totals = _stats.setdefault(difficulty, {
+            "moves": 0, "seconds": 0.0, "nodes": 0, "max_seconds": 0.0, "max_memory_bytes": 0,
+            "stopped_by": dict.fromkeys((SECONDS, NODES, MEMORY, "done"), 0),
+        })
+        totals["moves"] += 1
+        totals["seconds"] += usage.seconds
+        totals["nodes"] += usage.nodes
+        totals["max_seconds"] = max(totals["max_seconds"], usage.seconds)
+        totals["max_memory_bytes"] = max(totals["max_memory_bytes"], usage.memory_bytes)
+        totals["stopped_by"][usage.stopped_by or "done"] += 1
+
+def metrics() -> dict:
+    """
+    Returns the usage totals of every difficulty since startup, with the configured budgets.
+
+    Returns:
+        dict: For each difficulty, its budget, move count, total, average and largest time,
+        total and average nodes, largest memory, and how many searches each limit ended.
+    """
+
+    with _stats_lock:
+        return {
+            difficulty: {
+                "budget": get_budget(difficulty)._asdict(),
+                **totals,
+                "stopped_by": dict(totals["stopped_by"]),
+                "avg_seconds": totals["seconds"] / totals["moves"],
+                "avg_nodes": totals["nodes"] / totals["moves"],
+            }
+            for difficulty, totals in _stats.items()
+        }
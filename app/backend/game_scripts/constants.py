@@ -1,2 +1,34 @@
+import math
+import os
+
 colors = ("Black", "White") #Assumes first color listed goes first and that there are only two colors
-base_komi = 6.5
\ No newline at end of file
+base_komi = 6.5
+parallel_workers = os.cpu_count() or 1 #Worker processes, and search trees, of the insane difficulty
+move_budgets = {
+    "medium": {"seconds": 5.0, "nodes": 300, "memory_mb": 64},
+    "hard": {"seconds": 5.0, "nodes": 2000, "memory_mb": 128},
+    "very_hard": {"seconds": 5.0, "nodes": 5_000_000, "memory_mb": 32},
+    "insane": {"seconds": 5.0, "nodes": 20000 * parallel_workers, "memory_mb": 256},
+} #Per-move search budget of each search difficulty: wall time, playouts or nodes and memory, in total across workers for insane; AI_<DIFFICULTY>_<FIELD> overrides a field, e.g. AI_HARD_SECONDS=2
+for _difficulty, _budget in move_budgets.items():
+    for _field, _default in _budget.items():
+        _name = f"AI_{_difficulty.upper()}_{_field.upper()}"
+        _value = os.environ.get(_name)
+        if _value is None:
+            continue
+        try:
+            _number = float(_value)
+        except ValueError:
+            _number = math.nan
+        if not math.isfinite(_number):
+            raise ValueError(f"Invalid {_name} '{_value}': expected a number, such as {_default}.")
+        # Parsed as a float first, so that values like 64.5 or 1e5 are accepted for the integer fields
+        _budget[_field] = type(_default)(_number)
+alphabeta_max_depth = 12 #Deepest iteration of the alpha-beta search
+transposition_entries = 1 << 16 #Most slots in the alpha-beta transposition table, fewer if the memory budget is smaller
+opening_book_path = os.environ.get("OPENING_BOOK_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")) #Book consulted by the AI before searching
+ponder_seconds = float(os.environ.get("PONDER_SECONDS", 0)) #Background search time per game between MCTS moves, 0 disables pondering
+ponder_playouts = int(os.environ.get("PONDER_PLAYOUTS", 20000)) #Largest tree, in playouts, kept or grown for one game
+ponder_max_games = int(os.environ.get("PONDER_MAX_GAMES", 64)) #Games whose trees are kept at once, least recently used evicted first
+ponder_idle_seconds = float(os.environ.get("PONDER_IDLE_SECONDS", 600)) #Time after which the tree of an abandoned game is evicted
+snapshot_interval = int(os.environ.get("SNAPSHOT_INTERVAL", 50)) #Moves between stored snapshots of a game; restoring applies the move diffs logged since the last one
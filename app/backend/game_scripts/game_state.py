@@ -1,8 +1,59 @@
-from typing import Literal, Optional, List
-from collections import defaultdict, deque
+from typing import Literal, Optional, List, Dict, Set, Tuple, Iterable, NamedTuple, FrozenSet, Hashable
+from array import array
 import copy
+import struct
+
+from backend.game_scripts import utils, player, node, constants, AI, board, bitboard
+
+ENGINES = {"array": board.Board, "bitboard": bitboard.BitBoard}
+
+STATE_MAGIC = b"SSGS"
+STATE_VERSION = 1
+DIFFICULTIES = ("easy", "medium", "hard", "very_hard", "insane", "self")
+# magic, version, height, width, difficulty, passes, komi, position hash, total turns, then the turns of each color in constants.colors order
+STATE_HEADER = struct.Struct("<4sBBBBBdQ" + "I" * (1 + len(constants.colors)))
+# color code, AI difficulty (HUMAN for a human player) and score, once per player in the game's order
+STATE_PLAYER = struct.Struct("<BBd")
+HUMAN = 0xFF
+# the four 2-bit control codes packed in each byte value, and the eight router flags
+_UNPACK_CONTROL = [bytes((value >> shift) & 3 for shift in range(0, 8, 2)) for value in range(256)]
+_UNPACK_ROUTERS = [bytes((value >> shift) & 1 for shift in range(8)) for value in range(256)]
+# score of each color in constants.colors order, then a MOVE_CELL per cell changed by the move
+MOVE_SCORES = struct.Struct("<" + "d" * len(constants.colors))
+# cell index, then router owner code << 2 | controller code
+MOVE_CELL = struct.Struct("<HB")
+
+def _score_type(color: str, score: float) -> float:
+    # Only the second color's score holds the komi and is a float; keep the first one an int as in a live game
+    return score if color == constants.colors[1] else int(score)
+
+class Snapshot(NamedTuple):
+    """
+    Mutable part of a GameState, captured by GameState.snapshot().
+
+    The board shape, neighbor table, Zobrist keys, players, difficulty and komi are not part of it;
+    they stay shared with the game the snapshot was taken from.
+    """
 
-from backend.game_scripts import utils, player, node, constants, AI
+    cells: Tuple[bytes, bytes, int]
+    scores: Tuple[float, ...]
+    turns: Dict[str, int]
+    passes: int
+    prev_graphs: FrozenSet[int]
+
+class ScoreDelta(NamedTuple):
+    """
+    Effect of a placement on the game, computed by GameState.score_delta().
+
+    Attributes:
+        scores (dict[str, float]): Score change of each color.
+        captured (int): Number of routers the placement destroys.
+        territory (dict[str, int]): Change in the number of router-free cells each color controls.
+    """
+
+    scores: Dict[str, float]
+    captured: int
+    territory: Dict[str, int]
 
 class GameState:
     """
@@ -14,25 +65,39 @@ class GameState:
         height (int): Height of the game board (number of rows).
         width (int): Width of the game board (number of columns).
         full (bool, optional): Whether to generate a fully connected board graph. Defaults to True.
+        engine (str, optional): Board backend, "array" or "bitboard". Defaults to "array".
 
     Attributes:
         players (dict[str, Player]): Dictionary of players by color.
         ai_player (Optional[Player]): The AI player, if any.
         ai_controller (Optional[AI]): The AI controller logic instance, if any.
         komi (float): Komi score bonus given to the second player to balance advantage.
-        graph (dict[str, Node]): The game board represented as a graph of nodes.
+        board (Board): Array-backed router ownership and territory control of every cell.
+        prev_graphs (set[int]): Zobrist hashes of every position reached after a placement, for superko checks.
+        dirty_cells (set[int]): Cells changed by the last place_router().
         _turns (dict[str, int]): Internal turn counters.
 
     Public Methods:
         - get_player_turn() -> Player: Returns the current player whose turn it is.
         - is_Ai_turn() -> bool: Checks whether it's currently the AI's turn.
-        - ai_move() -> Optional[str]: Executes an AI move and returns the chosen node ID.
+        - ai_move(ponder_key) -> Optional[str]: Executes an AI move and returns the chosen node ID.
         - place_router(node_id: str) -> bool: Attempts to place a router at the given node.
         - get_possible_moves() -> set[str]: Returns the set of valid node IDs for placement.
         - valid_placement(node_id: str) -> bool: Determines if a router can be placed at the node.
+        - capturing_moves_mask() -> int: Returns the cells where a placement captures a group.
+        - score_delta(node_id: str) -> ScoreDelta: Computes the effect of a placement without playing it.
+        - play(node_id: str) -> None: Plays a move without validation, recording it for undo().
+        - undo() -> None: Reverts the most recent play().
+        - set_engine(engine: str) -> None: Moves the position to another board backend.
+        - snapshot() -> Snapshot: Captures the mutable state of the game.
+        - restore(snapshot: Snapshot) -> None: Puts the game back into a captured state.
+        - to_bytes() -> bytes: Encodes the game in the compact versioned binary format.
+        - from_bytes(data: bytes) -> GameState: Class method restoring a game encoded by to_bytes().
+        - move_diff() -> bytes: Encodes the cells changed by the last placement and the scores.
+        - apply_move_diff(node_id: str, diff: Optional[bytes]) -> None: Replays a move from its diff.
     """
 
-    def __init__(self, difficulty: Literal["easy", "medium", "hard", "very_hard", "insane", "self"] = "self", height: int = 5, width: int = 5, full: bool = True):
+    def __init__(self, difficulty: Literal["easy", "medium", "hard", "very_hard", "insane", "self"] = "self", height: int = 5, width: int = 5, full: bool = True, engine: Literal["array", "bitboard"] = "array"):
         """
         Initializes the game state with players, AI, board graph, and komi scoring.
 
@@ -41,6 +106,7 @@ class GameState:
             height (int): Height of the board.
             width (int): Width of the board.
             full (bool, optional): Whether to generate a fully connected board. Defaults to True.
+            engine (str, optional): Board backend, "array" or "bitboard". Defaults to "array".
         """
 
         self._turns = {"Total": 0}
@@ -58,20 +124,28 @@ class GameState:
             ai_player = self.players[colors[1]]
             self.players[colors[1]] = AI.AI(difficulty, ai_player.color, ai_player.score, ai_player.get_opponent())
             self.ai_players.append(colors[1])
-        
+
         self.difficulty = difficulty
 
         self.komi = utils.compute_komi(difficulty, height, width)
         self.players[constants.colors[1]].increment_score(self.komi)
 
-        self.graph = utils.generate_map(height, width, full)
+        if engine not in ENGINES:
+            raise ValueError(f"Invalid engine '{engine}'. Choose from: {', '.join(ENGINES)}.")
+        self.board = ENGINES[engine](height, width)
         self.height = height
         self.width = width
 
         self.passes = 0
 
         self.prev_graphs = set()
-    
+        self.dirty_cells = set()
+
+        self._undo_stack = []
+
+        self._legal_cache = {}
+        self.legal_cache_stats = {"hits": 0, "refreshes": 0, "misses": 0, "cells_analysed": 0}
+
     def __str__(self):
         """
         Returns a string representation of the board and current scores.
@@ -80,62 +154,237 @@ class GameState:
             str: Formatted board and score state.
         """
 
-        game_board = []
-
-        for node_id in self.graph:
-            y, x = map(int, node_id.split("."))
-            while y >= len(game_board):
-                game_board.append([])
-            nde = self.graph[node_id]
-            if nde.router_owner:
-                char = nde.router_owner[0].upper()
-            elif nde.controlled:
-                char = nde.controlled[0].lower()
-            else:
-                char = "."
-            game_board[y].append(char)
-        col_labels = "   " + " ".join(str(i) for i in range(len(game_board[0])))
+        owner, control = self.board.owner, self.board.control
+        col_labels = "   " + " ".join(str(i) for i in range(self.width))
         board_rows = []
-        for row_idx, row in enumerate(game_board):
+        for row_idx in range(self.height):
+            row = []
+            for idx in range(row_idx * self.width, (row_idx + 1) * self.width):
+                if owner[idx]:
+                    row.append(board.COLORS[owner[idx]][0].upper())
+                elif control[idx]:
+                    row.append(board.COLORS[control[idx]][0].lower())
+                else:
+                    row.append(".")
             board_rows.append(f"{row_idx:<2} " + " ".join(row))
         score_line = " | ".join(f"{p.color}: {p.score}" for p in self.players.values())
         return "\n".join([col_labels, *board_rows, "", score_line])
-    
+
     def __deepcopy__(self, memo):
-        copied_game = GameState(self.difficulty)
-        copied_game.graph = copy.deepcopy(self.graph, memo)
-        copied_game._turns = copy.deepcopy(self._turns, memo)
+        copied_game = GameState.__new__(GameState)
+        copied_game.difficulty = self.difficulty
+        copied_game.board = self.board.copy()
+        copied_game._turns = self._turns.copy()
         copied_game.passes = self.passes
         copied_game.komi = self.komi
         copied_game.height = self.height
         copied_game.width = self.width
         copied_game.players = {color: copy.deepcopy(plyer, memo) for color, plyer in self.players.items()}
         copied_game.ai_players = self.ai_players.copy()
-        copied_game.prev_graphs = copy.deepcopy(self.prev_graphs, memo)
+        copied_game.prev_graphs = self.prev_graphs.copy()
+        copied_game.dirty_cells = self.dirty_cells.copy()
+        copied_game._undo_stack = []
+        copied_game._legal_cache = self._legal_cache.copy()
+        copied_game.legal_cache_stats = dict.fromkeys(self.legal_cache_stats, 0)
 
         return copied_game
-    
-    def to_string_graph(self):
-        return "".join([str(nde) for nde in self.graph.values()])
-    
+
+    @property
+    def graph(self) -> Dict[str, node.Node]:
+        """
+        Node view of the board, rebuilt on every access. Mutating it does not affect the game.
+
+        Returns:
+            dict[str, Node]: Nodes indexed by their ID.
+        """
+
+        nbr_ids, owner, control = self.board.topology.nbr_ids, self.board.owner, self.board.control
+        graph = {}
+        for idx, node_id in enumerate(self.board.ids):
+            nde = node.Node(node_id, board.COLORS[owner[idx]], nbr_ids[idx])
+            nde.controlled = board.COLORS[control[idx]]
+            graph[node_id] = nde
+        return graph
+
+    def get_router_owner(self, node_id: str) -> Optional[str]:
+        """
+        Returns the color owning the router on a node.
+
+        Args:
+            node_id (str): The node ID.
+
+        Returns:
+            Optional[str]: The owner's color, or None if the node has no router.
+        """
+
+        return board.COLORS[self.board.owner[self.board.index[node_id]]]
+
+    def get_controller(self, node_id: str) -> Optional[str]:
+        """
+        Returns the color controlling a node.
+
+        Args:
+            node_id (str): The node ID.
+
+        Returns:
+            Optional[str]: The controller's color, or None if the node is uncontrolled.
+        """
+
+        return board.COLORS[self.board.control[self.board.index[node_id]]]
+
+    def get_neighbors(self, node_id: str) -> Tuple[str, ...]:
+        """
+        Returns the IDs of the nodes adjacent to a node.
+
+        Args:
+            node_id (str): The node ID.
+
+        Returns:
+            tuple[str, ...]: Neighboring node IDs.
+        """
+
+        return self.board.topology.nbr_ids[self.board.index[node_id]]
+
     def to_dict(self):
-        return {"turns": self._turns,"players": {color: plyer.to_dict() for color, plyer in self.players.items()}, "ai_players": self.ai_players, 
-                "difficulty": self.difficulty, "komi": self.komi, "graph": {nde_id: nde.to_dict() for nde_id, nde in self.graph.items()},
+        nbr_ids, owner, control = self.board.topology.nbr_ids, self.board.owner, self.board.control
+        graph = {node_id: {"node_id": node_id, "nbr_ids": list(nbr_ids[idx]), "router_owner": board.COLORS[owner[idx]], "controlled": board.COLORS[control[idx]]}
+                 for idx, node_id in enumerate(self.board.ids)}
+        return {"turns": self._turns,"players": {color: plyer.to_dict() for color, plyer in self.players.items()}, "ai_players": self.ai_players,
+                "difficulty": self.difficulty, "komi": self.komi, "graph": graph,
                 "height": self.height, "width": self.width, "passes": self.passes, "prev_graphs": list(self.prev_graphs)}
-    
+
     def from_dict(self, dict_data):
         self._turns = dict_data["turns"]
         self.ai_players = dict_data["ai_players"]
         self.players = {color: (player.Player().from_dict(plyer) if color not in self.ai_players else AI.AI().from_dict(plyer)) for color, plyer in dict_data["players"].items()}
         self.difficulty = dict_data["difficulty"]
         self.komi = dict_data["komi"]
-        self.graph = {nde_id: node.Node().from_dict(nde) for nde_id, nde in dict_data["graph"].items()}
         self.height = dict_data["height"]
         self.width = dict_data["width"]
+        owner = bytearray(self.height * self.width)
+        control = bytearray(self.height * self.width)
+        index = board.get_topology(self.height, self.width).index
+        for nde_id, nde in dict_data["graph"].items():
+            owner[index[nde_id]] = board.CODES.get(nde["router_owner"], board.EMPTY)
+            control[index[nde_id]] = board.CODES.get(nde["controlled"], board.EMPTY)
+        self.board = type(self.board).from_cells(self.height, self.width, owner, control)
         self.passes = dict_data["passes"]
-        self.prev_graphs = set(dict_data["prev_graphs"])
+        # Games saved before positions were hashed stored board strings, which can not be converted
+        self.prev_graphs = {position_hash for position_hash in dict_data["prev_graphs"] if isinstance(position_hash, int)}
         return self
-    
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the game in the compact versioned binary format.
+
+        The layout is STATE_HEADER, a STATE_PLAYER record per player, the control code of every
+        cell at 2 bits each, a router flag per cell at 1 bit each, then the position history as
+        sorted unsigned 64-bit hashes. A router is always on a cell its owner controls, so the
+        two planes hold the whole board; neighbors follow from the height and width.
+
+        Returns:
+            bytes: The encoded game.
+        """
+
+        size = self.board.size
+        owner, control = self.board.owner, self.board.control
+        header = STATE_HEADER.pack(
+            STATE_MAGIC, STATE_VERSION, self.height, self.width, DIFFICULTIES.index(self.difficulty), min(self.passes, 255), self.komi,
+            self.board.hash, self._turns["Total"], *(self._turns[color] for color in constants.colors),
+        )
+        players = b"".join(
+            STATE_PLAYER.pack(board.CODES[color], DIFFICULTIES.index(plyer.difficulty) if color in self.ai_players else HUMAN, plyer.score)
+            for color, plyer in self.players.items()
+        )
+
+        control_plane = bytearray((size + 3) // 4)
+        router_plane = bytearray((size + 7) // 8)
+        for idx in range(size):
+            if control[idx]:
+                control_plane[idx >> 2] |= control[idx] << ((idx & 3) << 1)
+                if owner[idx]:
+                    if owner[idx] != control[idx]:
+                        raise ValueError(f"Can not encode node '{self.board.ids[idx]}': its router is on a cell controlled by another color.")
+                    router_plane[idx >> 3] |= 1 << (idx & 7)
+        return header + players + bytes(control_plane) + bytes(router_plane) + array("Q", sorted(self.prev_graphs)).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes, engine: Literal["array", "bitboard"] = "array") -> "GameState":
+        """
+        Restores a game from the output of to_bytes().
+
+        Args:
+            data (bytes): The encoded game.
+            engine (str, optional): Board backend, "array" or "bitboard". Defaults to "array".
+
+        Returns:
+            GameState: The decoded game.
+        """
+
+        if len(data) < STATE_HEADER.size or data[:4] != STATE_MAGIC:
+            raise ValueError("Data is not an encoded game state.")
+        magic, version, height, width, difficulty, passes, komi, position_hash, total_turns, *turns = STATE_HEADER.unpack_from(data)
+        if version != STATE_VERSION:
+            raise ValueError(f"Can not decode game state version {version}, only version {STATE_VERSION}.")
+        if engine not in ENGINES:
+            raise ValueError(f"Invalid engine '{engine}'. Choose from: {', '.join(ENGINES)}.")
+
+        game = cls.__new__(cls)
+        game.players, game.ai_players = {}, []
+        offset = STATE_HEADER.size
+        for _ in constants.colors:
+            code, ai_difficulty, score = STATE_PLAYER.unpack_from(data, offset)
+            offset += STATE_PLAYER.size
+            color = board.COLORS[code]
+            score = _score_type(color, score)
+            if ai_difficulty == HUMAN:
+                game.players[color] = player.Player(color, score)
+            else:
+                game.players[color] = AI.AI(DIFFICULTIES[ai_difficulty], color, score)
+                game.ai_players.append(color)
+        for color, plyer in game.players.items():
+            plyer.set_opponent(next(other for other in game.players if other != color))
+
+        size = height * width
+        control_end = offset + (size + 3) // 4
+        router_end = control_end + (size + 7) // 8
+        control = b"".join(_UNPACK_CONTROL[value] for value in data[offset:control_end])[:size]
+        routers = b"".join(_UNPACK_ROUTERS[value] for value in data[control_end:router_end])[:size]
+        # Router flags are 0 or 1 per byte, so times 3 they mask whole control codes without carries
+        owner = (int.from_bytes(control, "little") & (int.from_bytes(routers, "little") * 3)).to_bytes(size, "little")
+        history = array("Q")
+        history.frombytes(data[router_end:])
+
+        game._turns = {"Total": total_turns, **dict(zip(constants.colors, turns))}
+        game.difficulty = DIFFICULTIES[difficulty]
+        game.komi = komi
+        # Zobrist keys are seeded by board shape, so the stored hash stays valid across processes
+        game.board = ENGINES[engine].from_cells(height, width, owner, control, position_hash)
+        game.height = height
+        game.width = width
+        game.passes = passes
+        game.prev_graphs = set(history)
+        game.dirty_cells = set()
+        game._undo_stack = []
+        game._legal_cache = {}
+        game.legal_cache_stats = {"hits": 0, "refreshes": 0, "misses": 0, "cells_analysed": 0}
+        return game
+
+    def set_engine(self, engine: Literal["array", "bitboard"]) -> None:
+        """
+        Moves the current position to another board backend. Both backends play identically.
+
+        Args:
+            engine (str): "array" for the array and group-tracking board, "bitboard" for big-int bitmasks.
+        """
+
+        if engine not in ENGINES:
+            raise ValueError(f"Invalid engine '{engine}'. Choose from: {', '.join(ENGINES)}.")
+        if self._undo_stack:
+            raise ValueError("Can not change engine while moves are waiting to be undone.")
+
+        self.board = ENGINES[engine].from_cells(self.height, self.width, self.board.owner, self.board.control)
+
     def get_player_turn(self) -> player.Player:
         """
         Returns the current player based on the turn count.
@@ -143,9 +392,9 @@ class GameState:
         Returns:
             player.Player: The player whose turn it is.
         """
-     
+
         return self.players[constants.colors[0]] if self._turns["Total"] % 2 == 0 else self.players[constants.colors[1]]
-    
+
     def is_Ai_turn(self) -> bool:
         """
         Checks if it's currently the AI's turn.
@@ -153,22 +402,59 @@ class GameState:
         Returns:
             bool: True if it's the AI's turn, False otherwise.
         """
-         
+
         return self.get_player_turn().color in self.ai_players
-    
-    def ai_move(self) -> Optional[str]:
+
+    def ai_move(self, ponder_key: Optional[Hashable] = None) -> Optional[str]:
         """
         Executes and returns the AI's move.
 
+        Args:
+            ponder_key (Hashable, optional): Key of the game under which the AI may keep its
+                search tree for pondering. Defaults to None.
+
         Returns:
             Optional[str]: The node ID where the AI decides to place, or None.
         """
         if not self.is_Ai_turn():
             raise ValueError(f"Can not resolve the AI's move since it is not the AI's turn")
-        
+
         curr_ai = self.get_player_turn()
-        return curr_ai.AI_move(copy.deepcopy(self))
-    
+        saved = self.snapshot()
+        try:
+            return curr_ai.AI_move(self, ponder_key=ponder_key)
+        finally:
+            self.restore(saved)
+
+    def snapshot(self) -> Snapshot:
+        """
+        Captures the mutable state of the game: cells, scores, turns, passes and position history.
+
+        Costs one copy of the two cell arrays plus the small per-game counters; everything that
+        can not change during a game is shared rather than copied.
+
+        Returns:
+            Snapshot: The captured state.
+        """
+
+        return Snapshot(self.board.snapshot(), tuple(plyer.score for plyer in self.players.values()), self._turns.copy(), self.passes, frozenset(self.prev_graphs))
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """
+        Puts the game back into a state captured by snapshot(), discarding any pending undo history.
+
+        Args:
+            snapshot (Snapshot): Value returned by snapshot() on this game.
+        """
+
+        self.board.restore(snapshot.cells)
+        for plyer, score in zip(self.players.values(), snapshot.scores):
+            plyer.score = score
+        self._turns = snapshot.turns.copy()
+        self.passes = snapshot.passes
+        self.prev_graphs = set(snapshot.prev_graphs)
+        self._undo_stack = []
+
     def take_turn(self) -> None:
         """
         Advances the game turn counter for both the current player and total turns.
@@ -176,115 +462,95 @@ class GameState:
 
         self._turns[self.get_player_turn().color] += 1
         self._turns["Total"] += 1
-    
-    def group_has_liberties(self, start_node: node.Node, controller: str, excluded: List[str] = []) -> bool:
+
+    def group_has_liberties(self, start_id: str, controller: str, excluded: List[str] = []) -> bool:
         """
         Checks if a group of routers controlled by the player has any adjacent empty nodes.
 
         Args:
-            start_node (node.Node): Starting node of the group.
-            controller (player.Player): Owner of the group.
+            start_id (str): ID of the starting node of the group.
+            controller (str): Color owning the group.
+            excluded (list[str], optional): Node IDs that do not count as liberties.
 
         Returns:
             bool: True if the group has at least one liberty, False if fully surrounded.
         """
 
-        visited = {start_node.id}
-        for node in excluded:
-            visited.add(node)
-        queue = deque([start_node])
-        while queue:
-            curr = queue.popleft()
-            for nbr_id in curr.nbrs:
-                nbr = self.graph[nbr_id]
-                if nbr_id not in visited and nbr.router_owner == controller:
-                    queue.append(nbr)
-                    visited.add(nbr_id)
-                elif not nbr.router_owner and nbr_id not in visited:
-                    return True
-        return False
+        index = self.board.index
+        return self.board.has_liberties(index[start_id], board.CODES[controller], [index[node_id] for node_id in excluded])
 
-    def is_group_capturable(self, start_node: node.Node, attacker: player.Player, excluded: List[str] = []) -> bool:
+    def is_group_capturable(self, start_id: str, attacker: player.Player, excluded: List[str] = []) -> bool:
         """
         Determines if an opponent group is capturable from the given node.
 
         Args:
-            start_node (node.Node): A node in the opponent's group.
+            start_id (str): ID of a node in the opponent's group.
             attacker (player.Player): Player attempting the capture.
+            excluded (list[str], optional): Node IDs that do not count as liberties.
 
         Returns:
             bool: True if the group can be captured, False otherwise.
         """
 
-        return not self.group_has_liberties(start_node, attacker.get_opponent(), excluded)
+        return not self.group_has_liberties(start_id, attacker.get_opponent(), excluded)
 
-    def destroy_territory_routers(self, start_node: node.Node) -> None:
+    def destroy_territory_routers(self, start_id: str) -> None:
         """
         Destroys all routers in the connected group starting from the given node.
 
         Args:
-            start_node (node.Node): Node to start the destruction from.
+            start_id (str): ID of the node to start the destruction from.
         """
 
-        opponent = start_node.router_owner
-        queue = deque([start_node])
-        self.players[start_node.router_owner].decrement_score()
-        start_node.destroy()
-        while queue:
-            curr_node = queue.popleft()
-            for nbr_id in curr_node.nbrs:
-                nbr_node = self.graph[nbr_id]
-                if nbr_node.router_owner == opponent:
-                    queue.append(nbr_node)
-                    self.players[nbr_node.router_owner].decrement_score()
-                    nbr_node.destroy()
+        self._destroy_territory_routers(self.board.index[start_id])
 
-    def update_territory_control(self, start_node: node.Node) -> None:
+    def _destroy_territory_routers(self, start: int) -> None:
+        opponent_player = self.players[board.COLORS[self.board.owner[start]]]
+        for idx in self.board.group_cells(start):
+            opponent_player.decrement_score()
+            self.board.destroy(idx)
+
+    def update_territory_control(self, start_id: str) -> None:
         """
         Updates the control status of a territory region starting from a node.
 
         Args:
-            start_node (node.Node): Node to evaluate the territory from.
-        """
-
-        queue = deque([start_node])
-        visited = {start_node.id}
-        controlled = True if start_node.controlled else False
-        routers_owners_found = set()
-        potential_border = defaultdict(int)
-
-        while queue:
-            curr_node = queue.popleft()
-            for nbr_id in curr_node.nbrs:
-                if nbr_id not in visited:
-                    nbr_node = self.graph[nbr_id]
-                    if nbr_node.router_owner:
-                        routers_owners_found.add(self.players[nbr_node.router_owner])
-                        potential_border[nbr_node] += 1
-                    else:
-                        visited.add(nbr_id)
-                        queue.append(nbr_node)
-        if controlled and len(routers_owners_found) > 1:
-            for node_id in visited:
-                self.players[self.graph[node_id].controlled].decrement_score()
-                self.graph[node_id].uncapture()
-        elif not controlled and len(routers_owners_found) == 1 and len(visited) < len(self.graph) - 3:
-            owner = next(iter(routers_owners_found))
-            for node_id in visited:
-                self.graph[node_id].capture(owner.color, False)
-                owner.increment_score()
+            start_id (str): ID of the node to evaluate the territory from.
+        """
+
+        self._update_territory_control(self.board.index[start_id])
+
+    def _update_territory_control(self, start: int) -> Iterable[int]:
+        control = self.board.control
+        controlled = bool(control[start])
+        visited, routers_owners_found = self.board.flood_region(start)
 
-    def capture_territory(self, start_node: node.Node) -> None:
+        if controlled and len(routers_owners_found) > 1:
+            for idx in visited:
+                self.players[board.COLORS[control[idx]]].decrement_score()
+                self.board.uncapture(idx)
+        elif not controlled and len(routers_owners_found) == 1 and len(visited) < self.board.size - 3:
+            code = next(iter(routers_owners_found))
+            owner_player = self.players[board.COLORS[code]]
+            for idx in visited:
+                self.board.capture(idx, code, False)
+                owner_player.increment_score()
+        return visited
+
+    def capture_territory(self, start_id: str) -> None:
         """
         Captures a territory by destroying enemy routers and updating control.
 
         Args:
-            start_node (node.Node): A node in the opponent's group to be captured.
+            start_id (str): ID of a node in the opponent's group to be captured.
         """
 
-        self.destroy_territory_routers(start_node)
-        self.update_territory_control(start_node)
-    
+        self._capture_territory(self.board.index[start_id])
+
+    def _capture_territory(self, start: int) -> None:
+        self._destroy_territory_routers(start)
+        self._update_territory_control(start)
+
     def get_possible_moves(self) -> set[str]:
         """
         Computes all currently valid node placements for the current player.
@@ -293,8 +559,99 @@ class GameState:
             Set[str]: Set of node IDs that are valid placements.
         """
 
-        return {node_id for node_id in self.graph if self.valid_placement(node_id)}
-    
+        ids = self.board.ids
+        return {ids[idx] for idx in board.iter_bits(self.legal_moves_mask())}
+
+    def legal_moves_mask(self, check_repetition: bool = True) -> int:
+        """
+        Computes the legality of every cell for the current player in one pass.
+
+        The liberty and capture analysis comes from _liberty_analysis(), which only redoes the
+        cells near what changed since the last call. A move is only simulated when it captures,
+        or when the router layout it produces has been seen before, since only those moves can
+        repeat an earlier position.
+
+        Args:
+            check_repetition (bool, optional): Whether to drop moves that repeat an earlier
+                position. Defaults to True.
+
+        Returns:
+            int: Bitmask with bit row * width + col set for every valid placement.
+        """
+
+        code = board.CODES[self.get_player_turn().color]
+        opponent = board.CODES[self.get_player_turn().get_opponent()]
+        legal, captures = self._liberty_analysis(code, opponent)
+        if not check_repetition or not self.prev_graphs:
+            return legal
+
+        seen_layouts = {position_hash >> board.ROUTER_SHIFT for position_hash in self.prev_graphs}
+        router_keys, position_hash = self.board.topology.router_keys, self.board.hash
+        for idx in board.iter_bits(legal):
+            if (captures >> idx) & 1 or ((position_hash ^ router_keys[idx][code]) >> board.ROUTER_SHIFT) in seen_layouts:
+                if self._repeats_position(idx):
+                    legal &= ~(1 << idx)
+        return legal
+
+    def capturing_moves_mask(self) -> int:
+        """
+        Finds the cells where a placement by the current player captures at least one group.
+
+        Repetition is not checked, so some of these cells may not be valid placements.
+
+        Returns:
+            int: Bitmask with bit row * width + col set for every capturing cell.
+        """
+
+        code = board.CODES[self.get_player_turn().color]
+        opponent = board.CODES[self.get_player_turn().get_opponent()]
+        return self._liberty_analysis(code, opponent)[1]
+
+    def _liberty_analysis(self, code: int, opponent: int) -> Tuple[int, int]:
+        """
+        Returns the board's move_analysis() for a player, kept in a cache per color code.
+
+        The analysis only depends on the router owners, so the cache entry keeps the board shape
+        and owner array it was computed from. When the owners differ, only the cells returned by the
+        board's affected_cells() for the changed cells are analysed again; the rest is reused.
+        Territory control and repetition are not part of the cached result.
+
+        Args:
+            code (int): Color code of the player to move.
+            opponent (int): Color code of the other player.
+
+        Returns:
+            tuple[int, int]: Bitmask of the playable cells, and bitmask of the capturing cells.
+        """
+
+        topology, owner = self.board.topology, bytes(self.board.owner)
+        cached = self._legal_cache.get(code)
+        if cached is not None and cached[0] is topology and cached[1] == owner:
+            self.legal_cache_stats["hits"] += 1
+            return cached[2], cached[3]
+
+        if cached is None or cached[0] is not topology:
+            self.legal_cache_stats["misses"] += 1
+            self.legal_cache_stats["cells_analysed"] += len(owner)
+            playable, captures = self.board.move_analysis(code, opponent)
+        else:
+            diff = int.from_bytes(owner, "little") ^ int.from_bytes(cached[1], "little")
+            changed = []
+            while diff:
+                idx = ((diff & -diff).bit_length() - 1) >> 3
+                changed.append(idx)
+                diff &= ~(0xFF << (idx << 3))
+
+            affected = self.board.affected_cells(changed)
+            self.legal_cache_stats["refreshes"] += 1
+            self.legal_cache_stats["cells_analysed"] += affected.bit_count()
+            playable, captures = self.board.move_analysis(code, opponent, affected)
+            playable |= cached[2] & ~affected
+            captures |= cached[3] & ~affected
+
+        self._legal_cache[code] = (topology, owner, playable, captures)
+        return playable, captures
+
     def valid_placement(self, node_id: str) -> bool:
         """
         Checks if the current player can legally place a router at the given node.
@@ -306,25 +663,134 @@ class GameState:
             bool: True if the move is valid, False otherwise.
         """
 
-        nde = self.graph[node_id]
-        curr_player = self.get_player_turn()
+        idx = self.board.index[node_id]
+        code = board.CODES[self.get_player_turn().color]
+        opponent = board.CODES[self.get_player_turn().get_opponent()]
         some_group_no_liberties = False
-        for nbr in nde.nbrs:
-            nbr = self.graph[nbr]
-            if self.is_group_capturable(nbr, curr_player, [node_id]):
+        captures = False
+        for nbr in self.board.nbrs[idx]:
+            if not self.board.has_liberties(nbr, opponent, (idx,)):
                 some_group_no_liberties = True
-                break
-        
-        valid_move = not nde.has_router() and (self.group_has_liberties(nde, curr_player.color) or some_group_no_liberties)
+                captures = captures or self.board.owner[nbr] == opponent
+
+        valid_move = not self.board.owner[idx] and (self.board.has_liberties(idx, code) or some_group_no_liberties)
 
         prev_graph = False
-        if valid_move:
-            sim_game = copy.deepcopy(self)
-            sim_game._simulate_place_router(node_id)
-            prev_graph = sim_game.to_string_graph() in self.prev_graphs
+        if valid_move and self.prev_graphs:
+            layout = (self.board.hash ^ self.board.topology.router_keys[idx][code]) >> board.ROUTER_SHIFT
+            if captures or any(position_hash >> board.ROUTER_SHIFT == layout for position_hash in self.prev_graphs):
+                prev_graph = self._repeats_position(idx)
 
         return valid_move and not prev_graph
-    
+
+    def score_delta(self, node_id: str) -> ScoreDelta:
+        """
+        Computes what placing a router for the current player at the given node would change,
+        without modifying or copying the game.
+
+        Follows the same steps as place_router: the cell's previous controller loses it, the
+        regions and capturable groups around the cell are settled neighbor by neighbor, and every
+        cell changed along the way is tracked in small overlays over the board. Validity is not
+        checked.
+
+        Args:
+            node_id (str): The node ID to evaluate.
+
+        Returns:
+            ScoreDelta: Score, captured router and territory changes of the placement.
+        """
+
+        idx = self.board.index[node_id]
+        code = board.CODES[self.get_player_turn().color]
+        opponent = board.CODES[self.get_player_turn().get_opponent()]
+        owner, control, nbrs, size = self.board.owner, self.board.control, self.board.nbrs, self.board.size
+        new_owner, new_control = {idx: code}, {idx: code}
+        scores = [0.0] * len(board.COLORS)
+        territory = [0] * len(board.COLORS)
+
+        def owner_at(cell: int) -> int:
+            return new_owner.get(cell, owner[cell])
+
+        def control_at(cell: int) -> int:
+            return new_control.get(cell, control[cell])
+
+        def settle_region(start: int) -> Set[int]:
+            # Same rule as _update_territory_control, read through the overlays. An uncontrolled
+            # region stays uncontrolled once it has two bordering colors or is too large, so the
+            # flood stops there; the partial region is still enough to skip the other neighbors.
+            controller = control_at(start)
+            region, queue, borders = {start}, [start], set()
+            while queue:
+                if not controller and (len(borders) > 1 or len(region) >= size - 3):
+                    return region
+                for nbr in nbrs[queue.pop()]:
+                    nbr_owner = owner_at(nbr)
+                    if nbr_owner:
+                        borders.add(nbr_owner)
+                    elif nbr not in region:
+                        region.add(nbr)
+                        queue.append(nbr)
+
+            if controller and len(borders) > 1:
+                for cell in region:
+                    scores[control_at(cell)] -= 1
+                    territory[control_at(cell)] -= 1
+                    new_control[cell] = board.EMPTY
+            elif not controller and len(borders) == 1 and len(region) < size - 3:
+                controller = borders.pop()
+                for cell in region:
+                    new_control[cell] = controller
+                    scores[controller] += 1
+                    territory[controller] += 1
+            return region
+
+        def dead_group(start: int) -> List[int]:
+            group, queue = {start}, [start]
+            while queue:
+                for nbr in nbrs[queue.pop()]:
+                    nbr_owner = owner_at(nbr)
+                    if not nbr_owner:
+                        return []
+                    if nbr_owner == opponent and nbr not in group:
+                        group.add(nbr)
+                        queue.append(nbr)
+            return list(group)
+
+        if control[idx]:
+            scores[control[idx]] -= 1
+            if not owner[idx]:
+                territory[control[idx]] -= 1
+        scores[code] += 1
+
+        captured = 0
+        resolved = set()
+        for nbr in nbrs[idx]:
+            if not owner_at(nbr) and control_at(nbr) != code:
+                if nbr not in resolved:
+                    resolved.update(settle_region(nbr))
+            elif owner_at(nbr) == opponent:
+                group = dead_group(nbr)
+                for cell in group:
+                    scores[opponent] -= 1
+                    new_owner[cell] = new_control[cell] = board.EMPTY
+                captured += len(group)
+                if group:
+                    settle_region(nbr)
+
+        return ScoreDelta(
+            {color: scores[board.CODES[color]] for color in constants.colors},
+            captured,
+            {color: territory[board.CODES[color]] for color in constants.colors},
+        )
+
+    def _repeats_position(self, idx: int) -> bool:
+        self._push_undo()
+        try:
+            self._place_router(idx)
+            return self.board.hash in self.prev_graphs
+        finally:
+            self.undo()
+
     def place_router(self, node_id: str) -> bool:
         """
         Places a router for the current player if the move is valid.
@@ -336,43 +802,130 @@ class GameState:
             bool: True if placement was successful, False otherwise.
         """
 
-        curr_player = self.get_player_turn()
-
-        if node_id not in self.graph or not self.valid_placement(node_id):
+        if node_id not in self.board.index or not self.valid_placement(node_id):
             return False
 
-        target_node = self.graph[node_id]
-        if target_node.controlled:
-            self.players[target_node.controlled].decrement_score()
-            target_node.uncapture()
-        target_node.capture(curr_player.color, True)
-        curr_player.increment_score()
-
-        for nbr_id in target_node.nbrs:
-            nbr = self.graph[nbr_id]
-            if not nbr.router_owner and nbr.controlled != curr_player.color:
-                self.update_territory_control(nbr)
-            elif nbr.router_owner == curr_player.get_opponent() and self.is_group_capturable(nbr, curr_player):
-                self.capture_territory(nbr)
+        # The undo journal already records every mutated cell, so borrow it when it is off
+        journal = self.board.journal
+        if journal is None:
+            self.board.journal = []
+        mark = len(self.board.journal)
+        self._place_router(self.board.index[node_id])
+        self.dirty_cells = {idx for idx, _, _ in self.board.journal[mark:]}
+        if journal is None:
+            self.board.journal = None
 
         self.take_turn()
-        self.prev_graphs.add(self.to_string_graph())
+        self.prev_graphs.add(self.board.hash)
 
         return True
-    
-    def _simulate_place_router(self, node_id: str) -> bool:
-        curr_player = self.get_player_turn()
 
-        target_node = self.graph[node_id]
-        if target_node.controlled:
-            self.players[target_node.controlled].decrement_score()
-            target_node.uncapture()
-        target_node.capture(curr_player.color, True)
+    def move_diff(self) -> bytes:
+        """
+        Encodes the effect of the last place_router(): the final state of every cell in
+        dirty_cells and the resulting scores, a few bytes per changed cell.
+
+        Returns:
+            bytes: MOVE_SCORES followed by a MOVE_CELL per changed cell.
+        """
+
+        owner, control = self.board.owner, self.board.control
+        scores = MOVE_SCORES.pack(*(self.players[color].score for color in constants.colors))
+        return scores + b"".join(MOVE_CELL.pack(idx, owner[idx] << 2 | control[idx]) for idx in sorted(self.dirty_cells))
+
+    def apply_move_diff(self, node_id: str, diff: Optional[bytes]) -> None:
+        """
+        Replays a logged move from its diff without evaluating the rules, the same way
+        main.make_player_move would have played it.
+
+        Args:
+            node_id (str): The node ID placed on, or "pass".
+            diff (Optional[bytes]): Value of move_diff() after the placement; None for a pass.
+        """
+
+        if node_id == "pass":
+            self.take_turn()
+            self.passes += 1
+            return
+
+        cells = [(idx, state >> 2, state & 3) for idx, state in MOVE_CELL.iter_unpack(diff[MOVE_SCORES.size:])]
+        self.board.apply_cells(cells)
+        for color, score in zip(constants.colors, MOVE_SCORES.unpack_from(diff)):
+            self.players[color].score = _score_type(color, score)
+        self.dirty_cells = {idx for idx, _, _ in cells}
+        self.take_turn()
+        self.passes = 0
+        self.prev_graphs.add(self.board.hash)
+
+    def play(self, node_id: str) -> None:
+        """
+        Plays a move for the current player without checking its validity, recording every
+        change it makes so that undo() can restore the previous state exactly.
+
+        Passes and placements update the pass counter the same way main.make_player_move does.
+
+        Args:
+            node_id (str): The node ID to place a router on, or "pass".
+        """
+
+        frame = self._push_undo()
+        if node_id == "pass":
+            self.take_turn()
+            self.passes += 1
+            return
+
+        self._place_router(self.board.index[node_id])
+        self.take_turn()
+        self.passes = 0
+        if self.board.hash not in self.prev_graphs:
+            self.prev_graphs.add(self.board.hash)
+            frame[-1] = self.board.hash
+
+    def undo(self) -> None:
+        """
+        Reverts the most recent play(), restoring cells, scores, turns, passes and position history.
+        """
+
+        if not self._undo_stack:
+            raise ValueError("There is no move to undo.")
+
+        mark, position_hash, scores, turns, passes, added_hash = self._undo_stack.pop()
+        self.board.rollback(mark, position_hash)
+        for plyer, score in zip(self.players.values(), scores):
+            plyer.score = score
+        self._turns = turns
+        self.passes = passes
+        if added_hash is not None:
+            self.prev_graphs.discard(added_hash)
+        if not self._undo_stack:
+            self.board.journal = None
+
+    def _push_undo(self) -> list:
+        if self.board.journal is None:
+            self.board.journal = []
+        frame = [len(self.board.journal), self.board.hash, tuple(plyer.score for plyer in self.players.values()), self._turns.copy(), self.passes, None]
+        self._undo_stack.append(frame)
+        return frame
+
+    def _place_router(self, idx: int) -> None:
+        curr_player = self.get_player_turn()
+        code = board.CODES[curr_player.color]
+        opponent = board.CODES[curr_player.get_opponent()]
+        owner, control = self.board.owner, self.board.control
+
+        if control[idx]:
+            self.players[board.COLORS[control[idx]]].decrement_score()
+            self.board.uncapture(idx)
+        self.board.capture(idx, code, True)
         curr_player.increment_score()
 
-        for nbr_id in target_node.nbrs:
-            nbr = self.graph[nbr_id]
-            if not nbr.router_owner and nbr.controlled != curr_player.color:
-                self.update_territory_control(nbr)
-            elif nbr.router_owner == curr_player.get_opponent() and self.is_group_capturable(nbr, curr_player):
-                self.capture_territory(nbr)
\ No newline at end of file
+        # Only the regions next to the placement can change. A whole-board NumPy labelling was tried and
+        # is slower even batched over every candidate move, so each region is flooded at most once instead.
+        # Regions are uniformly controlled, so flooding one a second time from another neighbor changes nothing
+        resolved = set()
+        for nbr in self.board.nbrs[idx]:
+            if not owner[nbr] and control[nbr] != code:
+                if nbr not in resolved:
+                    resolved.update(self._update_territory_control(nbr))
+            elif owner[nbr] == opponent and not self.board.has_liberties(nbr, opponent):
+                self._capture_territory(nbr)
@@ -1,7 +1,7 @@
-from typing import Literal
+from typing import Hashable, Literal, Optional
 import random
 
-from backend.game_scripts import game_state
+from backend.game_scripts import game_state, constants, pondering, budget
 
 def create_game(difficulty: Literal["easy", "medium", "hard", "very_hard", "insane", "self", "random"], height: int, width: int, full: bool = True) -> game_state.GameState:
     """
@@ -45,29 +45,85 @@ def make_player_move(game: game_state.GameState, move: str) -> bool:
             game.passes = 0
         return val
     
-def make_ai_move(game: game_state.GameState) -> bool:
+def get_ai_move(game: game_state.GameState, ponder_key: Optional[Hashable] = None) -> Optional[str]:
+    """
+    Chooses the AI move if it's the AI's turn, without playing it.
+
+    Args:
+        game (GameState): The game object.
+        ponder_key (Hashable, optional): Key of the game, such as its ID, for pondering.
+
+    Returns:
+        Optional[str]: The node ID or "pass" chosen, or None if it is not the AI's turn.
+    """
+
+    if game.is_Ai_turn():
+        return game.ai_move(ponder_key)
+    return None
+
+def search_ai_move(data: bytes, ponder_key: Optional[Hashable] = None) -> Optional[str]:
+    """
+    Chooses the AI move of a game sent as GameState.to_bytes(), such as to a search process.
+
+    Args:
+        data (bytes): The encoded game.
+        ponder_key (Hashable, optional): Key of the game, such as its ID, for pondering.
+
+    Returns:
+        Optional[str]: The node ID or "pass" chosen, or None if it is not the AI's turn.
+    """
+
+    return get_ai_move(game_state.GameState.from_bytes(data), ponder_key)
+
+def searches_in_pool(game: game_state.GameState) -> bool:
+    """
+    Tells whether the AI of a game already searches in worker processes of its own.
+
+    Args:
+        game (GameState): The game instance.
+
+    Returns:
+        bool: True for the insane difficulty, whose trees grow in the parallel_mcts pool.
+    """
+
+    return game.difficulty == "insane"
+
+def discard_ponder_tree(ponder_key: Hashable) -> None:
+    """
+    Drops the tree pondered for a game in this process, such as once the game has ended.
+
+    Args:
+        ponder_key (Hashable): Key of the game.
+    """
+
+    pondering.get_ponderer().discard(ponder_key)
+
+def get_search_metrics() -> dict:
+    """
+    Returns the pondering and move budget metrics of the searches run in this process.
+
+    Returns:
+        dict: Ponderer metrics under "pondering" and budget usage under "budgets".
+    """
+
+    return {"pondering": pondering.get_ponderer().metrics(), "budgets": budget.metrics()}
+
+def make_ai_move(game: game_state.GameState, ponder_key: Optional[Hashable] = None) -> bool:
     """
     Processes the AI move if it's the AI's turn.
 
     Args:
         game (GameState): The game object.
+        ponder_key (Hashable, optional): Key of the game, such as its ID, for pondering.
 
     Returns:
         bool: True if the AI made a move, else False.
     """
 
-    if game.is_Ai_turn():
-        ai_move = game.ai_move()
-        if ai_move == "pass":
-            game.take_turn()
-            game.passes += 1
-            return True
-        else:
-            val = game.place_router(ai_move)
-            if val:
-                game.passes = 0
-            return val
-    return True
+    ai_move = get_ai_move(game, ponder_key)
+    if ai_move is None:
+        return True
+    return make_player_move(game, ai_move)
 
 def is_game_over(game: game_state.GameState) -> bool:
     """
@@ -86,4 +142,91 @@ def get_game_data(game):
     return game.to_dict()
 
 def restore_game_from_data(dict_data):
-    return game_state.GameState().from_dict(dict_data)
\ No newline at end of file
+    return game_state.GameState().from_dict(dict_data)
+
+def get_game_record(game: game_state.GameState) -> dict:
+    """
+    Builds the database record of a game: its binary state plus the columns queried on their own.
+
+    Args:
+        game (GameState): The game instance.
+
+    Returns:
+        dict: The state from GameState.to_bytes(), AI colors, difficulty, komi, size and passes.
+    """
+
+    return {
+        "state": game.to_bytes(),
+        "ai_players": game.ai_players,
+        "difficulty": game.difficulty,
+        "komi": game.komi,
+        "height": game.height,
+        "width": game.width,
+        "passes": game.passes,
+    }
+
+def restore_game_from_record(record: dict) -> game_state.GameState:
+    """
+    Restores a game from its database record: the latest snapshot, then the moves logged since.
+
+    Args:
+        record (dict): The snapshot from get_game_record() and the (move, diff) pairs logged
+            after it, or the JSON data of a game stored before the binary format. Moves logged
+            without a diff are replayed through the rules.
+
+    Returns:
+        GameState: The restored game.
+    """
+
+    if "state" not in record:
+        return restore_game_from_data(record)
+
+    game = game_state.GameState.from_bytes(record["state"])
+    for move, diff in record.get("moves", ()):
+        if diff is not None or move == "pass":
+            game.apply_move_diff(move, diff)
+        elif not make_player_move(game, move):
+            raise ValueError(f"Logged move '{move}' is not legal after turn {get_turn(game)}.")
+    return game
+
+def get_move_diff(game: game_state.GameState, move: str) -> Optional[bytes]:
+    """
+    Encodes the cells and scores changed by the move just played, for the move log.
+
+    Args:
+        game (GameState): The game, after the move.
+        move (str): The node ID or "pass" played.
+
+    Returns:
+        Optional[bytes]: GameState.move_diff(), or None for a pass, which changes no cell.
+    """
+
+    return None if move == "pass" else game.move_diff()
+
+def get_turn(game: game_state.GameState) -> int:
+    """
+    Returns the number of moves and passes played so far, which numbers logged moves.
+
+    Args:
+        game (GameState): The game instance.
+
+    Returns:
+        int: The game's turn count.
+    """
+
+    return game._turns["Total"]
+
+def snapshot_due(game: game_state.GameState) -> bool:
+    """
+    Tells whether the move just played should store a new snapshot besides its log entry.
+
+    Snapshots are stored every constants.snapshot_interval turns and when the game ends.
+
+    Args:
+        game (GameState): The game, after the move.
+
+    Returns:
+        bool: True if get_game_record(game) should be stored.
+    """
+
+    return is_game_over(game) or get_turn(game) % constants.snapshot_interval == 0
@@ -0,0 +1,262 @@
+from typing import Dict, List, NamedTuple, Optional, TYPE_CHECKING
+import math
+import random
+import sys
+import time
+
+if TYPE_CHECKING:
+    from backend.game_scripts import game_state
+
+from backend.game_scripts import board, budget
+
+PASS = "pass"
+EXPLORATION = math.sqrt(2)
+SAMPLE_TRIES = 8
+
+class SearchReport(NamedTuple):
+    """
+    Outcome and throughput of one search.
+
+    Attributes:
+        move (str): The chosen node ID, or "pass".
+        playouts (int): Number of playouts run.
+        seconds (float): Wall-clock time spent searching.
+        playouts_per_second (float): Playout throughput of the search.
+        visits (dict[str, int]): Visit count of every move tried at the root.
+        reused (int): Playouts the root already had when the search started.
+        memory_bytes (int): Estimated size of the tree at the end of the search.
+        stopped_by (Optional[str]): The budget limit that ended the search, see budget.Usage.
+    """
+
+    move: str
+    playouts: int
+    seconds: float
+    playouts_per_second: float
+    visits: Dict[str, int]
+    reused: int = 0
+    memory_bytes: int = 0
+    stopped_by: Optional[str] = None
+
+class TreeNode:
+    """
+    Node of the search tree, reached by playing `move` from its parent.
+
+    Args:
+        move (Optional[str]): Node ID or "pass" leading to this node, None for the root.
+        parent (Optional[TreeNode]): The node this move was played from.
+        mover (str): Color of the player who played `move`.
+        untried (list[str]): Moves from this node that have no child yet.
+
+    Attributes:
+        children (list[TreeNode]): Expanded moves from this node.
+        visits (int): Number of playouts that went through this node.
+        wins (float): Playout results from the point of view of `mover`, 0.5 per tie.
+    """
+
+    __slots__ = ("move", "parent", "mover", "untried", "children", "visits", "wins")
+
+    def __init__(self, move: Optional[str], parent: Optional["TreeNode"], mover: str, untried: List[str]) -> None:
+        self.move = move
+        self.parent = parent
+        self.mover = mover
+        self.untried = untried
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self) -> "TreeNode":
+        """
+        Picks the child with the highest UCT value.
+
+        Returns:
+            TreeNode: The child to descend into.
+        """
+
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.wins / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits))
+
+def candidate_moves(game: "game_state.GameState") -> List[str]:
+    """
+    Lists every legal move of the current player, passing included, or none once the game is over.
+
+    Args:
+        game (GameState): The position to list the moves of.
+
+    Returns:
+        list[str]: Node IDs of the valid placements followed by "pass".
+    """
+
+    if game.passes >= 2:
+        return []
+    ids = game.board.ids
+    return [ids[idx] for idx in board.iter_bits(game.legal_moves_mask())] + [PASS]
+
+def playout(game: "game_state.GameState", rng: random.Random, max_moves: int) -> int:
+    """
+    Plays random moves until both players pass or `max_moves` is reached.
+
+    Moves only apply the liberty rule, not repetition, and a player never fills a cell it
+    already controls; a player with nothing else to play passes. Every move goes through
+    game.play(), so the caller undoes them.
+
+    Playouts run on whichever board engine the game uses. The searches keep the array board:
+    the bitboard only plays them faster on small boards (about 1.5x on 5x5), is even on 9x9 to
+    13x13 and is slower on 19x19, where its flood fills take one mask shift per cell of distance.
+
+    Args:
+        game (GameState): The position to play from, modified in place.
+        rng (random.Random): Source of the move choices.
+        max_moves (int): Maximum number of moves to play.
+
+    Returns:
+        int: Number of moves played.
+    """
+
+    ids, control, size = game.board.ids, game.board.control, game.board.size
+    played = 0
+    while game.passes < 2 and played < max_moves:
+        code = board.CODES[game.get_player_turn().color]
+        legal = game.legal_moves_mask(check_repetition=False)
+        move = PASS
+        # Most cells are usually playable, so a few blind draws avoid listing the mask
+        for _ in range(SAMPLE_TRIES):
+            idx = rng.randrange(size)
+            if (legal >> idx) & 1 and control[idx] != code:
+                move = ids[idx]
+                break
+        cells = list(board.iter_bits(legal)) if move == PASS else []
+        while cells:
+            pick = rng.randrange(len(cells))
+            idx = cells[pick]
+            if control[idx] != code:
+                move = ids[idx]
+                break
+            cells[pick] = cells[-1]
+            cells.pop()
+        game.play(move)
+        played += 1
+    return played
+
+def root_node(game: "game_state.GameState") -> TreeNode:
+    """
+    Creates an empty search tree for the current player of a game.
+
+    Args:
+        game (GameState): The position the tree starts from.
+
+    Returns:
+        TreeNode: The root, with every candidate move untried.
+    """
+
+    return TreeNode(None, None, game.get_player_turn().get_opponent(), candidate_moves(game))
+
+def node_bytes(root: TreeNode) -> int:
+    """
+    Estimates the memory of one tree node, taking every node to have as many moves as the root.
+
+    Args:
+        root (TreeNode): Root of the tree.
+
+    Returns:
+        int: Bytes of a node, its move lists, its win total and the reference its parent holds.
+    """
+
+    moves = len(root.untried) + len(root.children)
+    return sys.getsizeof(root) + sys.getsizeof([None] * moves) + sys.getsizeof([]) + sys.getsizeof(0.5) + 8
+
+def grow(game: "game_state.GameState", root: TreeNode, rng: random.Random, playouts: int, deadline: float) -> int:
+    """
+    Adds playouts to a search tree until `playouts` were run or perf_counter() passes `deadline`.
+
+    At least one playout is run. Every move is played and undone on `game` itself, which must
+    be in the root's position and is left as it was found.
+
+    Args:
+        game (GameState): The position of the root.
+        root (TreeNode): The tree to grow.
+        rng (random.Random): Source of randomness.
+        playouts (int): Maximum number of playouts.
+        deadline (float): perf_counter() value after which no playout is started.
+
+    Returns:
+        int: Number of playouts run.
+    """
+
+    max_moves = 2 * game.height * game.width
+    done = 0
+    while done < playouts and (not done or time.perf_counter() < deadline):
+        tree_node, depth = root, 0
+        while not tree_node.untried and tree_node.children:
+            tree_node = tree_node.select_child()
+            game.play(tree_node.move)
+            depth += 1
+
+        if tree_node.untried:
+            pick = rng.randrange(len(tree_node.untried))
+            move = tree_node.untried[pick]
+            tree_node.untried[pick] = tree_node.untried[-1]
+            tree_node.untried.pop()
+            mover = game.get_player_turn().color
+            game.play(move)
+            depth += 1
+            child = TreeNode(move, tree_node, mover, candidate_moves(game))
+            tree_node.children.append(child)
+            tree_node = child
+
+        depth += playout(game, rng, max_moves)
+        scores = {color: plyer.score for color, plyer in game.players.items()}
+        for _ in range(depth):
+            game.undo()
+
+        while tree_node is not None:
+            tree_node.visits += 1
+            own, other = scores[tree_node.mover], max(score for color, score in scores.items() if color != tree_node.mover)
+            tree_node.wins += 1.0 if own > other else 0.5 if own == other else 0.0
+            tree_node = tree_node.parent
+        done += 1
+    return done
+
+def search(game: "game_state.GameState", playouts: int, seconds: float, rng: Optional[random.Random] = None, root: Optional[TreeNode] = None, memory_bytes: Optional[int] = None) -> SearchReport:
+    """
+    Runs UCT Monte Carlo tree search for the current player.
+
+    The search is anytime: it stops once the root has `playouts` visits, the tree reaches
+    `memory_bytes` or `seconds` have passed, whichever comes first, and always completes at
+    least one playout. Each playout adds at most one node, so the memory limit is enforced as a
+    playout limit. Every move is played and undone on `game` itself, which is left as it was found.
+
+    Args:
+        game (GameState): The position to search.
+        playouts (int): Maximum number of playouts, counting those already in `root`.
+        seconds (float): Wall-clock budget of the search.
+        rng (random.Random, optional): Source of randomness. Defaults to one seeded from the
+            global `random` stream, so that seeding `random` makes the search repeatable.
+        root (TreeNode, optional): Tree of this position to continue, such as one kept from
+            an earlier search. Defaults to a new tree.
+        memory_bytes (int, optional): Estimated tree size at which to stop. Defaults to no limit.
+
+    Returns:
+        SearchReport: The most visited root move and the search statistics.
+    """
+
+    rng = rng or random.Random(random.getrandbits(64))
+    root = root or root_node(game)
+    reused = root.visits
+    per_node = node_bytes(root)
+    limit, stopped_by = playouts, budget.NODES
+    if memory_bytes is not None and memory_bytes // per_node - 1 < limit:
+        limit, stopped_by = memory_bytes // per_node - 1, budget.MEMORY
+
+    start = time.perf_counter()
+    wanted = max(1, limit - reused)
+    done = grow(game, root, rng, wanted, start + seconds)
+    if done < wanted:
+        stopped_by = budget.SECONDS
+
+    elapsed = time.perf_counter() - start
+    visits = {child.move: child.visits for child in root.children}
+    if visits:
+        move = max(visits, key=visits.get)
+    else:
+        move = root.untried[0] if root.untried else PASS
+    return SearchReport(move, done, elapsed, done / elapsed if elapsed else 0.0, visits, reused, (root.visits + 1) * per_node, stopped_by)
@@ -0,0 +1,84 @@
+from typing import Iterable, Tuple
+import argparse
+import json
+import random
+import tracemalloc
+
+from backend.game_scripts import main
+
+BOARD_SIZES = ((5, 5), (13, 13), (20, 20))
+
+def play_sample_game(height: int, width: int, fill: float = 0.5, seed: int = 0) -> dict:
+    """
+    Plays random legal moves until a share of the board is occupied and returns the stored game data.
+
+    Args:
+        height (int): Board height.
+        width (int): Board width.
+        fill (float, optional): Share of the cells to play moves on. Defaults to 0.5.
+        seed (int, optional): Seed for the move choices. Defaults to 0.
+
+    Returns:
+        dict: The game as it would be stored in the database.
+    """
+
+    rng = random.Random(seed)
+    game = main.create_game("easy", height, width)
+    for _ in range(int(height * width * fill)):
+        moves = sorted(game.get_possible_moves())
+        main.make_player_move(game, rng.choice(moves) if moves else "pass")
+    return json.loads(json.dumps(main.get_game_data(game)))
+
+def bytes_per_game(height: int, width: int, games: int = 200) -> float:
+    """
+    Measures the memory held by one live, restored, half-played game of the given shape.
+
+    Shared per-shape data (topology, neighbor tables, Zobrist keys) is built before measuring,
+    as it would already exist in a running worker. Each game lists its legal moves inside the
+    measurement, as the first move played on it does, so that its lazily built group tables and
+    legal move cache are counted.
+
+    Args:
+        height (int): Board height.
+        width (int): Board width.
+        games (int, optional): Number of games kept alive for the measurement. Defaults to 200.
+
+    Returns:
+        float: Average traced bytes per game.
+    """
+
+    game_data = play_sample_game(height, width)
+    main.restore_game_from_data(game_data)
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    live_games = [main.restore_game_from_data(game_data) for _ in range(games)]
+    for game in live_games:
+        game.get_possible_moves()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del live_games
+    return (current - baseline) / games
+
+def run(sizes: Iterable[Tuple[int, int]] = BOARD_SIZES, games: int = 200) -> dict:
+    """
+    Measures bytes per live game for every board size.
+
+    Args:
+        sizes (Iterable[tuple[int, int]], optional): (height, width) pairs. Defaults to BOARD_SIZES.
+        games (int, optional): Number of games kept alive per size. Defaults to 200.
+
+    Returns:
+        dict: Bytes per game keyed by "HxW".
+    """
+
+    return {f"{height}x{width}": round(bytes_per_game(height, width, games)) for height, width in sizes}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the memory footprint of live games.")
+    parser.add_argument("--games", type=int, default=200, help="games kept alive per board size")
+    args = parser.parse_args()
+
+    for shape, size in run(games=args.games).items():
+        print(f"{shape:>6}: {size:>8} bytes per live game")
@@ -8,7 +8,7 @@ class Node:
 
     Attributes:
         id (str): Unique identifier for the node.
-        nbrs (set[str]): Set of neighboring node ids.
+        nbrs (tuple[str, ...]): Neighboring node ids, shared by every node at this position on boards of the same shape.
         router_owner (Player | None): Player who owns the router at this node, if any.
         controlled (Player | None): Player who currently controls this node, if any.
 
@@ -18,7 +18,9 @@ class Node:
         destroy(): Destroy the node, removing control and router ownership.
     """
 
-    def __init__(self, node_id: str = "0.0", router_owner: str = None, nbrs: set[str] = None):
+    __slots__ = ("id", "nbrs", "router_owner", "controlled")
+
+    def __init__(self, node_id: str = "0.0", router_owner: str = None, nbrs: tuple[str, ...] = None):
         """
         Initializes a Node instance.
 
@@ -28,7 +30,7 @@ class Node:
         """
         
         self.id = node_id
-        self.nbrs = nbrs if nbrs else set()
+        self.nbrs = nbrs if nbrs else ()
         self.router_owner = router_owner
         self.controlled = router_owner
     
@@ -46,7 +48,7 @@ class Node:
     
     def from_dict(self, dict_data):
         self.id = dict_data["node_id"]
-        self.nbrs = set(dict_data["nbr_ids"])
+        self.nbrs = tuple(dict_data["nbr_ids"])
         self.router_owner = dict_data["router_owner"]
         self.controlled = dict_data["controlled"]
         return self
@@ -0,0 +1,304 @@
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple, TYPE_CHECKING
+import argparse
+import mmap
+import os
+import struct
+import time
+
+if TYPE_CHECKING:
+    from backend.game_scripts import game_state
+
+from backend.game_scripts import board, constants
+
+MAGIC = b"SSOB"
+VERSION = 2
+# magic, version, record count, then the number of plies from the empty board the book covers
+HEADER = struct.Struct("<4sHIH")
+# canonical position hash, canonical move cell (PASS_CELL for "pass"), canonical height and width,
+# difficulty, then side to move (color code) plus passes << 2
+RECORD = struct.Struct("<QHBBBB")
+PASS_CELL = 0xFFFF
+DIFFICULTIES = ("easy", "medium", "hard", "very_hard", "insane")
+BOOK_DIFFICULTIES = ("medium", "hard", "very_hard", "insane")
+BOOK_SIZES = range(3, 8)
+
+@lru_cache(maxsize=None)
+def symmetries(height: int, width: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Lists the board symmetries that map a shape onto its canonical shape.
+
+    The canonical shape has the smaller dimension as its height, so a board and its transpose
+    share entries. Square boards have 8 symmetries, other boards 4.
+
+    Args:
+        height (int): Number of rows.
+        width (int): Number of columns.
+
+    Returns:
+        tuple[tuple[int, ...], ...]: For each symmetry, the canonical cell index of every cell.
+    """
+
+    transpose = height > width
+    canon_width = height if transpose else width
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (height - 1 - r, c),
+        lambda r, c: (r, width - 1 - c),
+        lambda r, c: (height - 1 - r, width - 1 - c),
+    ]
+    if transpose or height == width:
+        transposed = [lambda r, c, f=f: f(r, c)[::-1] for f in transforms]
+        transforms = transposed if transpose else transforms + transposed
+
+    perms = []
+    for transform in transforms:
+        perm = []
+        for row in range(height):
+            for col in range(width):
+                canon_row, canon_col = transform(row, col)
+                perm.append(canon_row * canon_width + canon_col)
+        perms.append(tuple(perm))
+    return tuple(perms)
+
+def canonical_key(game: "game_state.GameState") -> Tuple[int, int, Tuple[int, ...]]:
+    """
+    Hashes a position the same way for every symmetric variant of it.
+
+    Each symmetry's image of the position is hashed with the Zobrist keys of the canonical
+    shape, and the smallest hash wins.
+
+    Args:
+        game (GameState): The position to hash.
+
+    Returns:
+        tuple[int, int, tuple[int, ...]]: The canonical hash, the side and pass state byte, and
+        the symmetry that produced the hash.
+    """
+
+    height, width = game.height, game.width
+    topology = board.get_topology(min(height, width), max(height, width))
+    router_keys, control_keys = topology.router_keys, topology.control_keys
+    owner, control = game.board.owner, game.board.control
+    occupied = [idx for idx in range(game.board.size) if owner[idx] or control[idx]]
+
+    best_hash, best_perm = None, None
+    for perm in symmetries(height, width):
+        position_hash = 0
+        for idx in occupied:
+            position_hash ^= router_keys[perm[idx]][owner[idx]] ^ control_keys[perm[idx]][control[idx]]
+        if best_hash is None or position_hash < best_hash:
+            best_hash, best_perm = position_hash, perm
+    state = board.CODES[game.get_player_turn().color] | (min(game.passes, 3) << 2)
+    return best_hash, state, best_perm
+
+class OpeningBook:
+    """
+    Read-only view of an opening book file, memory-mapped so worker processes share its pages.
+
+    The file is HEADER (magic, version, record count, plies) followed by RECORDs sorted by their
+    fields, found by binary search on the canonical hash.
+
+    Args:
+        path (str): Path of the book file.
+
+    Attributes:
+        count (int): Number of records.
+        plies (int): Number of plies from the empty board the book covers.
+        shapes (frozenset[tuple[int, int]]): Board shapes with entries, smaller dimension first.
+
+    Public Methods:
+        lookup(game, difficulty): Returns the book move for a position, if there is one.
+        close(): Unmaps the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as book_file:
+            self._map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.plies = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"'{path}' is not a version {VERSION} opening book.")
+        records = self._map[HEADER.size:HEADER.size + self.count * RECORD.size]
+        self.shapes = frozenset((height, width) for _, _, height, width, _, _ in RECORD.iter_unpack(records))
+
+    def close(self) -> None:
+        """
+        Unmaps the file.
+        """
+
+        self._map.close()
+
+    def _record(self, position: int) -> Tuple[int, int, int, int, int, int]:
+        return RECORD.unpack_from(self._map, HEADER.size + position * RECORD.size)
+
+    def lookup(self, game: "game_state.GameState", difficulty: str) -> Optional[str]:
+        """
+        Returns the stored move of a position, mapped back onto the game's orientation.
+
+        Positions past the book's plies or of a shape it does not cover return None before the
+        position is hashed, so games out of the book cost almost nothing per move.
+
+        Args:
+            game (GameState): The position, with the AI to move.
+            difficulty (str): The AI difficulty the move was computed for.
+
+        Returns:
+            Optional[str]: Node ID or "pass", or None if the position is not in the book.
+        """
+
+        shape = (min(game.height, game.width), max(game.height, game.width))
+        if game._turns["Total"] >= self.plies or shape not in self.shapes:
+            return None
+
+        position_hash, state, perm = canonical_key(game)
+        wanted = (*shape, DIFFICULTIES.index(difficulty), state)
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < position_hash:
+                low = middle + 1
+            else:
+                high = middle
+
+        for position in range(low, self.count):
+            record_hash, cell, *fields = self._record(position)
+            if record_hash != position_hash:
+                break
+            if tuple(fields) == wanted:
+                return "pass" if cell == PASS_CELL else game.board.ids[perm.index(cell)]
+        return None
+
+def write_book(path: str, entries: Iterable[Tuple[int, int, int, int, int, int]], plies: int) -> int:
+    """
+    Writes book records to a file, sorted for lookup.
+
+    Args:
+        path (str): Path of the book file, replaced atomically.
+        entries (Iterable[tuple]): RECORD field tuples.
+        plies (int): Number of plies from the empty board the entries cover.
+
+    Returns:
+        int: Number of records written.
+    """
+
+    records = sorted(set(entries))
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, VERSION, len(records), plies))
+        for record in records:
+            book_file.write(RECORD.pack(*record))
+    os.replace(temp_path, path)
+    return len(records)
+
+def search_openings(height: int, width: int, difficulty: str, ai_color: str, plies: int) -> Dict[Tuple[int, int], int]:
+    """
+    Runs the engine on every position where the AI is to move in the first `plies` plies of a game.
+
+    Every placement of the human player is expanded, once per symmetry class, while the AI only
+    plays the move its engine chooses.
+
+    Args:
+        height (int): Board height.
+        width (int): Board width.
+        difficulty (str): AI difficulty whose engine picks the moves.
+        ai_color (str): Color played by the AI.
+        plies (int): Number of plies from the empty board to cover.
+
+    Returns:
+        dict[tuple[int, int], int]: Canonical move cell of every (canonical hash, state) searched.
+    """
+
+    from backend.game_scripts import game_state, player, AI
+
+    game = game_state.GameState(difficulty, height, width)
+    for color, plyer in list(game.players.items()):
+        if color == ai_color:
+            game.players[color] = AI.AI(difficulty, color, plyer.score, plyer.get_opponent())
+        else:
+            game.players[color] = player.Player(color, plyer.score, plyer.get_opponent())
+    game.ai_players = [ai_color]
+    ai_player = game.players[ai_color]
+
+    found, seen = {}, set()
+
+    def expand(plies_left: int) -> None:
+        position_hash, state, perm = canonical_key(game)
+        if not plies_left or game.passes >= 2 or (position_hash, state) in seen:
+            return
+        seen.add((position_hash, state))
+
+        if game.is_Ai_turn():
+            move = ai_player.AI_move(game, use_book=False)
+            found[(position_hash, state)] = PASS_CELL if move == "pass" else perm[game.board.index[move]]
+            candidates = [move]
+        else:
+            candidates = sorted(game.get_possible_moves())
+
+        for move in candidates:
+            game.play(move)
+            expand(plies_left - 1)
+            game.undo()
+
+    expand(plies)
+    return found
+
+def build(path: str, sizes: Iterable[int] = BOOK_SIZES, difficulties: Iterable[str] = BOOK_DIFFICULTIES, plies: int = 3) -> int:
+    """
+    Builds an opening book for every board shape with both dimensions in `sizes`.
+
+    Transposed shapes share their entries, so only shapes with height <= width are searched,
+    once with the AI moving first and once with it moving second.
+
+    Args:
+        path (str): Path of the book file to write.
+        sizes (Iterable[int], optional): Board dimensions to cover. Defaults to 3 through 7.
+        difficulties (Iterable[str], optional): Difficulties to cover. Defaults to BOOK_DIFFICULTIES.
+        plies (int, optional): Number of plies from the empty board to cover. Defaults to 3.
+
+    Returns:
+        int: Number of records written.
+    """
+
+    sizes = sorted(set(sizes))
+    records = []
+    for difficulty in difficulties:
+        for height in sizes:
+            for width in (size for size in sizes if size >= height):
+                for ai_color in constants.colors:
+                    start = time.perf_counter()
+                    found = search_openings(height, width, difficulty, ai_color, plies)
+                    records.extend((position_hash, cell, height, width, DIFFICULTIES.index(difficulty), state) for (position_hash, state), cell in found.items())
+                    print(f"{difficulty:>9} {height}x{width} {ai_color}: {len(found)} positions in {time.perf_counter() - start:.1f}s")
+    return write_book(path, records, plies)
+
+@lru_cache(maxsize=None)
+def load_book(path: str) -> Optional[OpeningBook]:
+    """
+    Opens a book file once per process.
+
+    Args:
+        path (str): Path of the book file.
+
+    Returns:
+        Optional[OpeningBook]: The book, or None if the file does not exist.
+    """
+
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute AI moves for the opening plies of small boards.")
+    parser.add_argument("--output", default=constants.opening_book_path, help="book file to write")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BOOK_SIZES), help="board dimensions to cover")
+    parser.add_argument("--difficulties", nargs="+", default=list(BOOK_DIFFICULTIES), choices=DIFFICULTIES, help="difficulties to cover")
+    parser.add_argument("--plies", type=int, default=3, help="plies from the empty board to cover")
+    parser.add_argument("--seconds", type=float, default=None, help="search time per position, overriding the move budgets")
+    args = parser.parse_args()
+
+    if args.seconds is not None:
+        for limits in constants.move_budgets.values():
+            limits["seconds"] = args.seconds
+    print(f"{build(args.output, args.sizes, args.difficulties, args.plies)} records written to {args.output}")
@@ -0,0 +1,182 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from array import array
+import multiprocessing
+import os
+import random
+import struct
+import threading
+import time
+
+from backend.game_scripts import constants, game_state, board, mcts, budget
+
+# height, width, passes, total turns, then the turns and score of each color in constants.colors order
+POSITION_HEADER = struct.Struct("<HHBI" + "I" * len(constants.colors) + "d" * len(constants.colors))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+def pack_position(game: "game_state.GameState") -> bytes:
+    """
+    Encodes everything a search needs from a game into a flat byte string.
+
+    The layout is POSITION_HEADER, then the owner and control code of every cell (one byte
+    each), then the position history as unsigned 64-bit hashes. Players, difficulty and komi
+    are left out, since the scores already include the komi.
+
+    Args:
+        game (GameState): The game to encode.
+
+    Returns:
+        bytes: The encoded position.
+    """
+
+    header = POSITION_HEADER.pack(
+        game.height,
+        game.width,
+        min(game.passes, 255),
+        game._turns["Total"],
+        *(game._turns[color] for color in constants.colors),
+        *(game.players[color].score for color in constants.colors),
+    )
+    return header + bytes(game.board.owner) + bytes(game.board.control) + array("Q", sorted(game.prev_graphs)).tobytes()
+
+def unpack_position(data: bytes) -> "game_state.GameState":
+    """
+    Rebuilds a playable game from the output of pack_position().
+
+    Args:
+        data (bytes): The encoded position.
+
+    Returns:
+        GameState: A game between two non-AI players with the encoded cells, scores, turns,
+        passes and position history.
+    """
+
+    fields = POSITION_HEADER.unpack_from(data)
+    height, width, passes, total_turns = fields[:4]
+    turns = fields[4:4 + len(constants.colors)]
+    scores = fields[4 + len(constants.colors):]
+
+    size = height * width
+    offset = POSITION_HEADER.size
+    owner = data[offset:offset + size]
+    control = data[offset + size:offset + 2 * size]
+    history = array("Q")
+    history.frombytes(data[offset + 2 * size:])
+
+    game = game_state.GameState("self", height, width)
+    # The array board, as for mcts.search: see mcts.playout() on why playouts skip the bitboard
+    game.board = board.Board.from_cells(height, width, owner, control)
+    game._turns = {"Total": total_turns, **dict(zip(constants.colors, turns))}
+    for color, score in zip(constants.colors, scores):
+        game.players[color].score = score
+    game.passes = passes
+    game.prev_graphs = set(history)
+    return game
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the shared worker pool, starting it on first use or when the worker count changes.
+
+    The worker processes stay alive between searches, so their imports and per-shape board
+    tables are only built once. They are started by a fork server rather than forked from the
+    caller, which may be a threaded server whose other threads hold locks at the time.
+
+    Args:
+        workers (int): Number of worker processes.
+
+    Returns:
+        ProcessPoolExecutor: The pool.
+    """
+
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            _stop_executor()
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+            _executor_workers = workers
+        return _executor
+
+def start(workers: int) -> None:
+    """
+    Starts the shared worker pool and waits until its processes are up, such as at server startup.
+
+    Args:
+        workers (int): Number of worker processes.
+    """
+
+    executor = get_executor(workers)
+    # The pool starts a process per task submitted while none is idle
+    for future in [executor.submit(os.getpid) for _ in range(workers)]:
+        future.result()
+
+def shutdown() -> None:
+    """
+    Stops the shared worker pool, if it is running.
+    """
+
+    with _executor_lock:
+        _stop_executor()
+
+def _stop_executor() -> None:
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        _executor_workers = 0
+
+def _search_position(data: bytes, playouts: int, deadline: float, seed: int, memory_bytes: Optional[int]) -> Tuple[Dict[str, int], int, int, Optional[str]]:
+    # The deadline is a time.time() value, comparable across processes, so time spent queued behind other searches counts
+    report = mcts.search(unpack_position(data), playouts, max(0.0, deadline - time.time()), random.Random(seed), memory_bytes=memory_bytes)
+    return report.visits, report.playouts, report.memory_bytes, report.stopped_by
+
+def search(game: "game_state.GameState", playouts: int, seconds: float, workers: int, memory_bytes: Optional[int] = None) -> mcts.SearchReport:
+    """
+    Runs one independent tree search per worker process from the same position and merges them.
+
+    The playout and memory budgets are split evenly between the trees. Root visit counts are
+    summed across the trees and the most visited move is chosen. Every worker stops at the same
+    deadline, taken when the search is submitted, so a search waiting for workers busy with
+    another one gets fewer playouts rather than more time. Each tree still runs at least one
+    playout, so the wall time can exceed the budget by one playout per queued tree.
+
+    Args:
+        game (GameState): The position to search, left unchanged.
+        playouts (int): Maximum number of playouts in total.
+        seconds (float): Wall-clock budget of the whole search, from submission.
+        workers (int): Number of worker processes, and of trees.
+        memory_bytes (int, optional): Estimated size of all trees at which to stop. Defaults to no limit.
+
+    Returns:
+        SearchReport: The chosen move with the merged visit counts and the totals of all trees.
+    """
+
+    start = time.perf_counter()
+    data = pack_position(game)
+    # Drawn from the global stream, like mcts.search's default rng, so seeding `random` repeats the search
+    seed = random.getrandbits(32)
+    tree_playouts = max(1, playouts // workers)
+    tree_memory = memory_bytes // workers if memory_bytes is not None else None
+    executor = get_executor(workers)
+    deadline = time.time() + seconds
+    futures = [executor.submit(_search_position, data, tree_playouts, deadline, seed + tree, tree_memory) for tree in range(workers)]
+
+    visits, total_playouts, total_memory, stops = {}, 0, 0, set()
+    for future in futures:
+        tree_visits, done, tree_bytes, stopped_by = future.result()
+        total_playouts += done
+        total_memory += tree_bytes
+        stops.add(stopped_by)
+        for move, count in tree_visits.items():
+            visits[move] = visits.get(move, 0) + count
+    stopped_by = next((limit for limit in (budget.SECONDS, budget.MEMORY, budget.NODES) if limit in stops), None)
+
+    elapsed = time.perf_counter() - start
+    if visits:
+        move = max(visits, key=visits.get)
+    else:
+        candidates = mcts.candidate_moves(game)
+        move = candidates[0] if candidates else mcts.PASS
+    return mcts.SearchReport(move, total_playouts, elapsed, total_playouts / elapsed if elapsed else 0.0, visits, 0, total_memory, stopped_by)
@@ -1,3 +1,5 @@
+from backend.game_scripts import utils
+
 class Player:
     """
     Represents a player in the game.
@@ -18,6 +20,8 @@ class Player:
         decrement_score(amount=1): Decrease the player's score.
     """
 
+    __slots__ = ("color", "score", "_opponent")
+
     def __init__(self, color: str = None, score: int = 0, opponent: str = None):
         """
         Initializes a Player instance.
@@ -55,9 +59,9 @@ class Player:
         return {"color": self.color, "score": self.score, "opponent": self._opponent}
     
     def from_dict(self, dict_data):
-        self.color = dict_data["color"]
+        self.color = utils.intern_color(dict_data["color"])
         self.score = dict_data["score"]
-        self._opponent = dict_data["opponent"]
+        self._opponent = utils.intern_color(dict_data["opponent"])
         return self
     
     def set_opponent(self, opponent: str) -> None:
@@ -0,0 +1,271 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Hashable, Iterator, Optional, TYPE_CHECKING
+import copy
+import random
+import threading
+import time
+
+if TYPE_CHECKING:
+    from backend.game_scripts import game_state
+
+from backend.game_scripts import constants, mcts
+
+SLICE_SECONDS = 0.02
+
+_ponderer: Optional["Ponderer"] = None
+_ponderer_lock = threading.Lock()
+
+class PonderEntry:
+    """
+    Search tree kept for one game while its human player is to move.
+
+    Args:
+        game (GameState): Private copy of the game in the root's position.
+        root (TreeNode): The tree, rooted at the human player's turn.
+
+    Attributes:
+        seconds (float): Background search time spent on the tree.
+        playouts (int): Background playouts added to the tree.
+        last_used (float): monotonic() time the tree was stored.
+        busy (bool): Whether the background thread is growing the tree.
+    """
+
+    __slots__ = ("game", "root", "seconds", "playouts", "last_used", "busy")
+
+    def __init__(self, game: "game_state.GameState", root: mcts.TreeNode) -> None:
+        self.game = game
+        self.root = root
+        self.seconds = 0.0
+        self.playouts = 0
+        self.last_used = time.monotonic()
+        self.busy = False
+
+class Ponderer:
+    """
+    Keeps the search trees of games between AI moves and grows them on a background thread.
+
+    After an AI move, the subtree of the chosen move is stored under the game's key. A single
+    daemon thread grows the stored trees in short slices, fairest first, while no foreground
+    search is running, until a tree has had `seconds` of search or holds `playouts` playouts.
+    When the AI is asked to move again, the child matching the human's reply is promoted to be
+    the root of the new search. Trees unused for `idle_seconds`, or beyond the `max_games` most
+    recent ones, are evicted.
+
+    Args:
+        seconds (float): Background search time per game and human turn.
+        playouts (int): Largest tree kept, in playouts.
+        max_games (int): Number of games whose trees are kept.
+        idle_seconds (float): Time after which an unused tree is evicted.
+
+    Public Methods:
+        searching(): Context manager pausing the background thread during a foreground search.
+        take(key, game): Removes a game's tree and returns the subtree of its current position.
+        store(key, game, root, report): Keeps the subtree of the move just chosen for pondering.
+        discard(key): Drops a game's tree.
+        metrics(): Returns pondering and reuse counters.
+    """
+
+    def __init__(self, seconds: float, playouts: int, max_games: int, idle_seconds: float) -> None:
+        self.seconds = seconds
+        self.playouts = playouts
+        self.max_games = max_games
+        self.idle_seconds = idle_seconds
+        self._entries: "OrderedDict[Hashable, PonderEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._searching = 0
+        self._thread = None
+        self._rng = random.Random()
+        self._counters = dict.fromkeys(("hits", "misses", "evicted", "pondered_playouts", "reused_playouts", "searched_playouts"), 0)
+        self._pondered_seconds = 0.0
+
+    @contextmanager
+    def searching(self) -> Iterator[None]:
+        """
+        Keeps the background thread idle for the duration of a foreground search.
+        """
+
+        with self._lock:
+            self._searching += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._searching -= 1
+                self._wake.notify_all()
+
+    def take(self, key: Hashable, game: "game_state.GameState") -> Optional[mcts.TreeNode]:
+        """
+        Removes the tree of a game and returns its subtree for the game's current position.
+
+        Args:
+            key (Hashable): The game's key.
+            game (GameState): The game, after the human's reply to the stored AI move.
+
+        Returns:
+            Optional[TreeNode]: The detached subtree, or None if there is no tree or the
+            reply was never expanded.
+        """
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            while entry is not None and entry.busy:
+                self._wake.wait()
+
+            child = self._match(entry, game) if entry is not None else None
+            if child is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            self._counters["reused_playouts"] += child.visits
+        child.parent = None
+        return child
+
+    def store(self, key: Hashable, game: "game_state.GameState", root: mcts.TreeNode, report: mcts.SearchReport) -> None:
+        """
+        Keeps the subtree of the chosen move so that it can be grown while the human thinks.
+
+        Args:
+            key (Hashable): The game's key.
+            game (GameState): The searched game, before the chosen move; left unchanged.
+            root (TreeNode): The tree of the search.
+            report (SearchReport): The search's report.
+        """
+
+        ponder_game = copy.deepcopy(game)
+        ponder_game.play(report.move)
+        with self._lock:
+            self._counters["searched_playouts"] += report.playouts
+            if ponder_game.passes >= 2:
+                self._entries.pop(key, None)
+                return
+
+        child = next((child for child in root.children if child.move == report.move), None)
+        if child is None:
+            child = mcts.root_node(ponder_game)
+        child.parent = None
+
+        with self._lock:
+            self._entries[key] = PonderEntry(ponder_game, child)
+            self._entries.move_to_end(key)
+            self._evict()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="ponder", daemon=True)
+                self._thread.start()
+            self._wake.notify_all()
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Drops the tree of a game, such as one that has ended.
+
+        Args:
+            key (Hashable): The game's key.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def metrics(self) -> dict:
+        """
+        Returns the number of kept trees and counters since startup.
+
+        `reuse_rate` is the share of the playouts behind the AI's moves that came from kept
+        trees rather than from the move's own search.
+
+        Returns:
+            dict: Kept games, promotion hits and misses, evictions, playout counters and reuse rate.
+        """
+
+        with self._lock:
+            used = self._counters["reused_playouts"] + self._counters["searched_playouts"]
+            return {
+                "games": len(self._entries),
+                **self._counters,
+                "pondered_seconds": self._pondered_seconds,
+                "reuse_rate": self._counters["reused_playouts"] / used if used else 0.0,
+            }
+
+    def _match(self, entry: PonderEntry, game: "game_state.GameState") -> Optional[mcts.TreeNode]:
+        ponder_game = entry.game
+        for child in entry.root.children:
+            ponder_game.play(child.move)
+            try:
+                if _same_position(ponder_game, game):
+                    return child
+            finally:
+                ponder_game.undo()
+        return None
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now - entry.last_used > self.idle_seconds]
+        expired += list(self._entries)[len(expired):len(self._entries) - self.max_games]
+        for key in expired:
+            del self._entries[key]
+        self._counters["evicted"] += len(expired)
+
+    def _next_entry(self) -> Optional[PonderEntry]:
+        if self._searching:
+            return None
+        pending = [entry for entry in self._entries.values() if entry.seconds < self.seconds and entry.root.visits < self.playouts]
+        return min(pending, key=lambda entry: entry.seconds, default=None)
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                self._evict()
+                entry = self._next_entry()
+                while entry is None:
+                    self._wake.wait(timeout=self.idle_seconds)
+                    self._evict()
+                    entry = self._next_entry()
+                entry.busy = True
+
+            start = time.perf_counter()
+            deadline = start + min(SLICE_SECONDS, self.seconds - entry.seconds)
+            try:
+                done = mcts.grow(entry.game, entry.root, self._rng, self.playouts - entry.root.visits, deadline)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    entry.busy = False
+                    entry.seconds += elapsed
+                    entry.playouts += done
+                    self._counters["pondered_playouts"] += done
+                    self._pondered_seconds += elapsed
+                    self._wake.notify_all()
+
+def _same_position(first: "game_state.GameState", second: "game_state.GameState") -> bool:
+    return (
+        first.board.size == second.board.size
+        and first.board.hash == second.board.hash
+        and first.passes == second.passes
+        and first.get_player_turn().color == second.get_player_turn().color
+        and all(first.players[color].score == second.players[color].score for color in constants.colors)
+        and first.prev_graphs == second.prev_graphs
+    )
+
+def get_ponderer() -> Ponderer:
+    """
+    Returns the process-wide ponderer, created on first use from the configured budgets.
+
+    Returns:
+        Ponderer: The ponderer.
+    """
+
+    global _ponderer
+    with _ponderer_lock:
+        if _ponderer is None:
+            _ponderer = Ponderer(constants.ponder_seconds, constants.ponder_playouts, constants.ponder_max_games, constants.ponder_idle_seconds)
+        return _ponderer
+
+def enabled() -> bool:
+    """
+    Tells whether pondering is configured, with PONDER_SECONDS above 0.
+
+    Returns:
+        bool: True if AI moves should keep their trees for pondering.
+    """
+
+    return constants.ponder_seconds > 0
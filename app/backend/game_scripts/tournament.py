@@ -0,0 +1,252 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+from backend.game_scripts import main, constants, utils, AI
+
+DIFFICULTIES = ("easy", "medium", "hard", "very_hard", "insane")
+BASE_ELO = 1500.0
+
+def play_game(black: str, white: str, height: int, width: int, seed: int, max_moves: int, move_seconds: Optional[float] = None, komi: Optional[float] = None) -> dict:
+    """
+    Plays one AI-vs-AI game through the main module.
+
+    The komi does not depend on which difficulty plays first, so that the two games of a pair
+    with colors swapped are played under the same rules.
+
+    Args:
+        black (str): Difficulty playing the first color.
+        white (str): Difficulty playing the second color.
+        height (int): Board height.
+        width (int): Board width.
+        seed (int): Seed of the global RNG, which drives color order and every AI choice. Tree
+            searches seed their own generators from it, but a time-bound search still stops
+            after a varying number of playouts.
+        max_moves (int): Moves after which the game is scored as it stands.
+        move_seconds (float, optional): Search budget per move, overriding the configured ones.
+        komi (float, optional): Komi of the second color. Defaults to the komi of a game between
+            two humans on this board, see default_komi().
+
+    Returns:
+        dict: Difficulty and final score of each color, komi, move count, and think times per difficulty.
+    """
+
+    if move_seconds is not None:
+        for limits in constants.move_budgets.values():
+            limits["seconds"] = move_seconds
+    random.seed(seed)
+
+    komi = default_komi(height, width) if komi is None else komi
+    game = main.create_game(black, height, width)
+    game.players[constants.colors[1]].score += komi - game.komi
+    game.komi = komi
+    for color, difficulty in zip(constants.colors, (black, white)):
+        plyer = game.players[color]
+        game.players[color] = AI.AI(difficulty, color, plyer.score, plyer.get_opponent())
+    game.ai_players = list(constants.colors)
+
+    think_times = {black: [], white: []}
+    moves = 0
+    while not main.is_game_over(game) and moves < max_moves:
+        difficulty = game.players[game.get_player_turn().color].difficulty
+        start = time.perf_counter()
+        main.make_ai_move(game)
+        think_times[difficulty].append(time.perf_counter() - start)
+        moves += 1
+
+    return {
+        "seed": seed,
+        "difficulties": {color: difficulty for color, difficulty in zip(constants.colors, (black, white))},
+        "scores": {color: game.players[color].score for color in constants.colors},
+        "komi": komi,
+        "moves": moves,
+        "think_times": think_times,
+    }
+
+def default_komi(height: int, width: int) -> float:
+    """
+    Returns the komi of a game between two humans on a board, which favors no difficulty.
+
+    Args:
+        height (int): Board height.
+        width (int): Board width.
+
+    Returns:
+        float: The komi.
+    """
+
+    return utils.compute_komi("self", height, width)
+
+def _play_game(args: tuple) -> dict:
+    return play_game(*args)
+
+def percentile(values: Sequence[float], share: float) -> float:
+    """
+    Returns the nearest-rank percentile of some values.
+
+    Args:
+        values (Sequence[float]): The values, in any order.
+        share (float): Percentile as a share between 0 and 1.
+
+    Returns:
+        float: The percentile, 0.0 for no values.
+    """
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(share * len(ordered)) - 1))]
+
+def estimate_elo(results: Iterable[Tuple[str, str, float]], iterations: int = 2000) -> Dict[str, float]:
+    """
+    Fits Elo ratings to game results by maximum likelihood, centered on BASE_ELO.
+
+    Args:
+        results (Iterable[tuple[str, str, float]]): (player, opponent, score) per game, score
+            being 1 for a win, 0.5 for a draw and 0 for a loss.
+        iterations (int, optional): Gradient steps. Defaults to 2000.
+
+    Returns:
+        dict[str, float]: Rating of every player.
+    """
+
+    results = list(results)
+    ratings = {name: 0.0 for game in results for name in game[:2]}
+    if len(ratings) < 2:
+        return {name: BASE_ELO for name in ratings}
+
+    step = 400.0 / max(1, len(results))
+    for _ in range(iterations):
+        gradient = dict.fromkeys(ratings, 0.0)
+        for name, opponent, score in results:
+            expected = 1.0 / (1.0 + 10 ** ((ratings[opponent] - ratings[name]) / 400.0))
+            gradient[name] += score - expected
+            gradient[opponent] -= score - expected
+        for name in ratings:
+            # Half a game of prior keeps unbeaten or winless players finite
+            ratings[name] += step * (gradient[name] - ratings[name] / 800.0)
+    mean = sum(ratings.values()) / len(ratings)
+    return {name: round(BASE_ELO + rating - mean, 1) for name, rating in ratings.items()}
+
+def run(pairs: Sequence[Tuple[str, str]], games: int, height: int, width: int, seed: int = 0, workers: int = 1, max_moves: Optional[int] = None, move_seconds: Optional[float] = None, komi: Optional[float] = None) -> dict:
+    """
+    Plays `games` games for every pair of difficulties, alternating colors, and aggregates them.
+
+    A run is only reproducible with a fixed PYTHONHASHSEED, since some engines iterate over sets
+    of node IDs, and with playout-bound rather than time-bound searches.
+
+    Args:
+        pairs (Sequence[tuple[str, str]]): Difficulty pairs to match.
+        games (int): Games per pair.
+        height (int): Board height.
+        width (int): Board width.
+        seed (int, optional): Base seed; game i of the run uses seed + i. Defaults to 0.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        max_moves (int, optional): Move cap per game. Defaults to four moves per cell.
+        move_seconds (float, optional): Search budget per move, overriding the configured ones.
+        komi (float, optional): Komi of every game. Defaults to default_komi() of the board.
+
+    Returns:
+        dict: Configuration, per-difficulty statistics and per-pair results.
+    """
+
+    max_moves = max_moves or 4 * height * width
+    komi = default_komi(height, width) if komi is None else komi
+    specs = []
+    for first, second in pairs:
+        for game in range(games):
+            black, white = (first, second) if game % 2 == 0 else (second, first)
+            specs.append((black, white, height, width, seed + len(specs), max_moves, move_seconds, komi))
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            records = list(executor.map(_play_game, specs, chunksize=max(1, len(specs) // (workers * 8))))
+    else:
+        records = [_play_game(spec) for spec in specs]
+    elapsed = time.perf_counter() - start
+
+    stats, elo_results, pair_results = {}, [], {}
+    for record in records:
+        (black, white), (black_score, white_score) = record["difficulties"].values(), record["scores"].values()
+        outcome = 1.0 if black_score > white_score else 0.0 if black_score < white_score else 0.5
+        elo_results.append((black, white, outcome))
+
+        pair = pair_results.setdefault(f"{min(black, white)} vs {max(black, white)}", {"games": 0, "wins": {}, "draws": 0})
+        pair["games"] += 1
+        if outcome == 0.5:
+            pair["draws"] += 1
+        else:
+            winner = black if outcome == 1.0 else white
+            pair["wins"][winner] = pair["wins"].get(winner, 0) + 1
+
+        for difficulty, score in ((black, outcome), (white, 1.0 - outcome)):
+            entry = stats.setdefault(difficulty, {"games": 0, "wins": 0, "draws": 0, "losses": 0, "game_lengths": [], "think_times": []})
+            entry["games"] += 1
+            entry["wins" if score == 1.0 else "draws" if score == 0.5 else "losses"] += 1
+            entry["game_lengths"].append(record["moves"])
+        for difficulty, times in record["think_times"].items():
+            stats[difficulty]["think_times"].extend(times)
+
+    ratings = estimate_elo(elo_results)
+    difficulties = {}
+    for difficulty, entry in stats.items():
+        think_times = entry.pop("think_times")
+        lengths = entry.pop("game_lengths")
+        difficulties[difficulty] = {
+            **entry,
+            "win_rate": (entry["wins"] + 0.5 * entry["draws"]) / entry["games"],
+            "elo": ratings[difficulty],
+            "avg_game_length": sum(lengths) / len(lengths),
+            "moves": len(think_times),
+            "moves_per_second": len(think_times) / sum(think_times) if sum(think_times) else 0.0,
+            "think_p50_seconds": percentile(think_times, 0.50),
+            "think_p99_seconds": percentile(think_times, 0.99),
+        }
+
+    return {
+        "config": {"pairs": [list(pair) for pair in pairs], "games_per_pair": games, "height": height, "width": width, "seed": seed, "workers": workers, "max_moves": max_moves, "move_seconds": move_seconds, "komi": komi, "hash_seed": os.environ.get("PYTHONHASHSEED")},
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "wall_seconds": elapsed,
+        "games": len(records),
+        "difficulties": difficulties,
+        "pairs": pair_results,
+    }
+
+def _parse_pair(text: str) -> Tuple[str, str]:
+    first, _, second = text.partition(":")
+    if first not in DIFFICULTIES or second not in DIFFICULTIES:
+        raise argparse.ArgumentTypeError(f"Invalid pair '{text}'. Use two of {', '.join(DIFFICULTIES)} joined by ':'.")
+    return first, second
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI games between difficulties and measure strength and speed.")
+    parser.add_argument("--pairs", type=_parse_pair, nargs="+", help="difficulty pairs such as easy:medium; defaults to a round robin of --difficulties")
+    parser.add_argument("--difficulties", nargs="+", choices=DIFFICULTIES, default=["easy", "medium"], help="difficulties of the round robin")
+    parser.add_argument("--games", type=int, default=100, help="games per pair")
+    parser.add_argument("--height", type=int, default=5, help="board height")
+    parser.add_argument("--width", type=int, default=5, help="board width")
+    parser.add_argument("--seed", type=int, default=0, help="base seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--max-moves", type=int, default=None, help="move cap per game")
+    parser.add_argument("--move-seconds", type=float, default=None, help="search budget per move")
+    parser.add_argument("--komi", type=float, default=None, help="komi of every game; defaults to that of a game between two humans")
+    parser.add_argument("--output", default="tournament.json", help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    pairs = args.pairs or list(itertools.combinations(args.difficulties, 2))
+    results = run(pairs, args.games, args.height, args.width, args.seed, args.workers, args.max_moves, args.move_seconds, args.komi)
+    with open(args.output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+
+    for difficulty, entry in sorted(results["difficulties"].items(), key=lambda item: -item[1]["elo"]):
+        print(f"{difficulty:>9}: elo {entry['elo']:>7.1f}  win rate {entry['win_rate']:.3f}  "
+              f"avg length {entry['avg_game_length']:.1f}  {entry['moves_per_second']:.1f} moves/s  "
+              f"think p50 {entry['think_p50_seconds'] * 1000:.1f} ms  p99 {entry['think_p99_seconds'] * 1000:.1f} ms")
+    print(f"{results['games']} games in {results['wall_seconds']:.1f}s, written to {args.output}")
@@ -1,7 +1,7 @@
 from typing import Dict, Literal
 import random
 
-from backend.game_scripts import node, constants
+from backend.game_scripts import node, constants, board
 
 def generate_map(height: int, width: int, full: bool = True) -> Dict[str, node.Node]:
     """
@@ -17,20 +17,8 @@ def generate_map(height: int, width: int, full: bool = True) -> Dict[str, node.N
     """
     EMPTY_CHANCE = 0.05
 
-    graph = {}
-    directions = ((1,0), (-1,0), (0,1), (0,-1))
-    for row in range(height):
-        for col in range(width):
-            node_id = f"{row}.{col}"
-            new_node = node.Node(node_id)
-            graph[new_node.id] = new_node
-            for d_row, d_col in directions:
-                nbr_row, nbr_col = d_row + row, d_col + col
-                if 0 <= nbr_row < height and 0 <= nbr_col < width:
-                    nbr_node_id = f"{nbr_row}.{nbr_col}"
-                    new_node.nbrs.add(nbr_node_id)
-
-    return graph
+    topology = board.get_topology(height, width)
+    return {node_id: node.Node(node_id, nbrs=topology.nbr_ids[idx]) for idx, node_id in enumerate(topology.ids)}
 
 def randomize_color(colors: set) -> list:
     """
@@ -45,6 +33,22 @@ def randomize_color(colors: set) -> list:
 
     return random.sample(colors, len(colors))
 
+def intern_color(color: str | None) -> str | None:
+    """
+    Return the shared instance of a color string, so colors read back from storage do not each keep their own copy.
+
+    Args:
+        color (str | None): A color name, or None.
+
+    Returns:
+        str | None: The matching string from constants.colors, or the input unchanged if it is not a known color.
+    """
+
+    for known in constants.colors:
+        if color == known:
+            return known
+    return color
+
 def compute_komi(bot_difficulty: Literal["easy", "medium", "hard", "very_hard", "insane"], height: int, width: int) -> float | None:
     """
     Compute the komi (compensation points) based on board size and bot difficulty.
@@ -24,13 +24,36 @@ async function makeAIMove() {
     }
 
     const res = await fetch(`ai/${gameId}`, {method: "PUT"});
-    const newData = await res.json();
+    let newData = await res.json();
+    if (!res.ok) {
+        // 503 when the AI queue is full
+        retryAIMove(newData.detail);
+        return;
+    }
+    while (newData.status === "queued" || newData.status === "running") {
+        const jobRes = await fetch(`/ai-job/${newData.job_id}?wait=25`, {method: "GET"});
+        newData = await jobRes.json();
+        if (!jobRes.ok) {
+            retryAIMove(newData.detail);
+            return;
+        }
+    }
+    if (newData.status === "failed") {
+        retryAIMove(newData.error);
+        return;
+    }
     if (newData.valid_move) {
         await getGame();
         currTurn = true;
     }
 }
 
+function retryAIMove(reason: string) {
+    if (confirm(`The AI could not make its move (${reason}). Try again?`)) {
+        makeAIMove();
+    }
+}
+
 async function makePlayerMove(move: string) {
     if (!currTurn || gameOver) {
         return;
@@ -0,0 +1,82 @@
+import os
+import random
+import threading
+
+import pytest
+
+from backend.API import ai_queue
+from backend.game_scripts import main
+
+def test_job_runs_and_returns_its_result() -> None:
+    jobs = ai_queue.AIJobQueue(workers=2, max_depth=4)
+    job = jobs.submit("a", lambda: {"move": "0.0"})
+    assert job.done.wait(5)
+    assert jobs.get(job.id) is job
+    assert job.to_dict() == {"job_id": job.id, "status": ai_queue.DONE, "move": "0.0"}
+    assert jobs.metrics()["completed"] == 1
+
+def test_failed_job_reports_its_error() -> None:
+    def task():
+        raise RuntimeError("search crashed")
+
+    jobs = ai_queue.AIJobQueue(workers=1, max_depth=4)
+    job = jobs.submit("a", task)
+    assert job.done.wait(5)
+    assert job.to_dict() == {"job_id": job.id, "status": ai_queue.FAILED, "error": "search crashed"}
+    assert jobs.metrics()["failed"] == 1
+
+    # A failed job no longer blocks new ones for the game
+    retry = jobs.submit("a", lambda: {"move": "pass"})
+    assert retry is not job and retry.done.wait(5) and retry.status == ai_queue.DONE
+
+def test_unfinished_job_of_a_game_is_shared() -> None:
+    release = threading.Event()
+    jobs = ai_queue.AIJobQueue(workers=1, max_depth=4)
+    job = jobs.submit("a", lambda: release.wait(5) and {})
+    assert jobs.submit("a", lambda: {}) is job
+    release.set()
+    assert job.done.wait(5)
+    assert jobs.metrics()["deduplicated"] == 1 and jobs.metrics()["submitted"] == 1
+
+def test_full_queue_rejects_jobs() -> None:
+    release = threading.Event()
+    jobs = ai_queue.AIJobQueue(workers=1, max_depth=1)
+    running = jobs.submit("a", lambda: release.wait(5) and {})
+    while running.status == ai_queue.QUEUED:
+        release.wait(0.01)
+    jobs.submit("b", lambda: {})
+
+    with pytest.raises(ai_queue.QueueFullError):
+        jobs.submit("c", lambda: {})
+    release.set()
+    assert running.done.wait(5)
+    assert jobs.metrics()["rejected"] == 1
+
+@pytest.fixture(scope="module")
+def search_workers():
+    workers = ai_queue.SearchWorkers(2)
+    workers.start()
+    yield workers
+    workers.shutdown()
+
+def test_search_workers_route_a_game_to_one_process(search_workers) -> None:
+    pids = {future.result() for future in search_workers.submit_all(os.getpid)}
+    assert len(pids) == 2 and os.getpid() not in pids
+    for key in ("a", "b", 3):
+        assert len({search_workers.submit(key, os.getpid).result() for _ in range(3)}) == 1
+
+def test_search_workers_choose_ai_moves(search_workers) -> None:
+    random.seed(1)
+    game = main.create_game("easy", 5, 5)
+    for _ in range(6):
+        if main.is_game_over(game):
+            break
+        if game.is_Ai_turn():
+            move = search_workers.submit("a", main.search_ai_move, game.to_bytes(), "a").result(timeout=60)
+        else:
+            move = sorted(game.get_possible_moves())[0]
+        assert main.make_player_move(game, move)
+
+    search_workers.submit("a", main.discard_ponder_tree, "a").result(timeout=10)
+    metrics = [future.result(timeout=10) for future in search_workers.submit_all(main.get_search_metrics)]
+    assert all("pondering" in data and "budgets" in data for data in metrics)
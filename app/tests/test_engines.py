@@ -0,0 +1,53 @@
+import copy
+import random
+
+import pytest
+
+from backend.game_scripts import game_state
+
+BOARD_SIZES = ((3, 3), (5, 5), (4, 7), (8, 8), (9, 9))
+
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("height, width", BOARD_SIZES)
+def test_engines_play_identically(height: int, width: int, seed: int) -> None:
+    # Plays the same random game on both engines in lockstep, with liberty probes and undos along the way
+    rng = random.Random(seed)
+    array_game = game_state.GameState("self", height, width)
+    bit_game = copy.deepcopy(array_game)
+    bit_game.set_engine("bitboard")
+
+    for turn in range(70):
+        legal = array_game.get_possible_moves()
+        assert legal == bit_game.get_possible_moves(), f"legal moves differ at move {turn}"
+        for _ in range(5):
+            start, code = rng.randrange(array_game.board.size), rng.choice((1, 2))
+            excluded = rng.sample(range(array_game.board.size), rng.randint(0, 2))
+            assert array_game.board.has_liberties(start, code, excluded) == bit_game.board.has_liberties(start, code, excluded)
+
+        move = rng.choice(sorted(legal) + ["pass"])
+        array_game.play(move)
+        bit_game.play(move)
+        assert str(array_game) == str(bit_game) and array_game.board.hash == bit_game.board.hash, f"boards differ after {move} at move {turn}"
+        if rng.random() < 0.3:
+            array_game.undo()
+            bit_game.undo()
+            assert str(array_game) == str(bit_game), f"boards differ after undoing {move} at move {turn}"
+
+    rebuilt = bit_game.board.copy()
+    rebuilt.rebuild_groups()
+    assert rebuilt.routers == bit_game.board.routers and rebuilt.territory == bit_game.board.territory
+
+@pytest.mark.parametrize("seed", range(4))
+def test_set_engine_keeps_the_position(seed: int) -> None:
+    rng = random.Random(seed)
+    game = game_state.GameState("self", 6, 6)
+    for _ in range(20):
+        game.place_router(rng.choice(sorted(game.get_possible_moves())))
+    moved = copy.deepcopy(game)
+    moved.set_engine("bitboard")
+    assert str(moved) == str(game) and moved.board.hash == game.board.hash
+    assert moved.get_possible_moves() == game.get_possible_moves()
+
+def test_set_engine_rejects_unknown_engines() -> None:
+    with pytest.raises(ValueError):
+        game_state.GameState("self", 3, 3).set_engine("gpu")
@@ -0,0 +1,164 @@
+import random
+import time
+
+import pytest
+
+from backend.API import game_cache
+from backend.game_scripts import main
+
+class FakeDatabase:
+    # Keeps the latest snapshot and move log of each game, and checks turns the way crud.add_moves does
+    def __init__(self) -> None:
+        self.rows = {}
+        self.writes = []
+        self.failing = set()
+
+    def create(self, key, game) -> None:
+        self.rows[key] = {"state": main.get_game_record(game)["state"], "snapshot_turn": main.get_turn(game), "moves": [], "status": None}
+
+    def load(self, key) -> dict:
+        row = self.rows[key]
+        return {"state": row["state"], "moves": [(move, diff) for turn, move, diff in row["moves"] if turn > row["snapshot_turn"]]}
+
+    def write(self, key, moves, snapshot, status) -> None:
+        if key in self.failing:
+            raise RuntimeError("database unavailable")
+        row = self.rows[key]
+        last = row["moves"][-1][0] if row["moves"] else row["snapshot_turn"]
+        if moves[0][0] != last + 1:
+            raise game_cache.StaleGameError(f"Game {key} is at turn {last}.")
+        row["moves"] += moves
+        if snapshot is not None:
+            row["state"], row["snapshot_turn"] = snapshot["state"], moves[-1][0]
+        row["status"] = status
+        self.writes.append((key, len(moves)))
+
+def new_game(seed: int):
+    random.seed(seed)
+    return main.create_game("self", 5, 5)
+
+def play(cache: game_cache.GameCache, key, rng: random.Random) -> str:
+    with cache.checkout(key) as game:
+        move = rng.choice(sorted(game.get_possible_moves()))
+        assert main.make_player_move(game, move)
+        cache.record(key, move, "over" if main.is_game_over(game) else "live")
+    return move
+
+def make_cache(db: FakeDatabase, **options) -> game_cache.GameCache:
+    settings = {"max_games": 10, "max_bytes": 10 ** 9, "idle_seconds": 60, "flush_delay": 60}
+    settings.update(options)
+    return game_cache.GameCache(db.load, db.write, **settings)
+
+def test_moves_are_coalesced_into_one_write() -> None:
+    db = FakeDatabase()
+    db.create("a", new_game(1))
+    cache = make_cache(db)
+    rng = random.Random(1)
+    for _ in range(4):
+        play(cache, "a", rng)
+    assert db.writes == []
+
+    cache.flush("a")
+    assert db.writes == [("a", 4)] and db.rows["a"]["status"] == "live"
+    metrics = cache.metrics()
+    assert metrics["misses"] == 1 and metrics["hits"] == 3 and metrics["flushed_moves"] == 4 and metrics["dirty"] == 0
+
+def test_database_restores_the_cached_game(monkeypatch) -> None:
+    monkeypatch.setattr(game_cache.main.constants, "snapshot_interval", 5)
+    db = FakeDatabase()
+    cache = make_cache(db)
+    for key in range(3):
+        db.create(key, new_game(key))
+    rng = random.Random(2)
+    for _ in range(12):
+        for key in range(3):
+            play(cache, key, rng)
+        if rng.random() < 0.5:
+            cache.flush_all()
+    cache.flush_all()
+
+    for key in range(3):
+        with cache.checkout(key) as game:
+            restored = main.restore_game_from_record(db.load(key))
+            assert str(restored) == str(game) and restored.prev_graphs == game.prev_graphs
+            assert db.rows[key]["snapshot_turn"] == 10
+
+def test_flusher_writes_after_the_delay() -> None:
+    db = FakeDatabase()
+    db.create("a", new_game(3))
+    cache = make_cache(db, flush_delay=0.05)
+    play(cache, "a", random.Random(3))
+    deadline = time.monotonic() + 2
+    while not db.writes and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert db.writes == [("a", 1)]
+
+def test_stale_game_is_dropped() -> None:
+    db = FakeDatabase()
+    db.create("a", new_game(4))
+    cache = make_cache(db)
+    rng = random.Random(4)
+    play(cache, "a", rng)
+    # Another process logs a move of the same game first
+    db.rows["a"]["moves"].append((1, "pass", None))
+
+    with pytest.raises(game_cache.StaleGameError):
+        cache.flush("a")
+    assert not cache.contains("a") and cache.metrics()["conflicts"] == 1
+
+def test_failing_game_backs_off_while_others_flush(monkeypatch) -> None:
+    monkeypatch.setattr(game_cache, "RETRY_SECONDS", 0.2)
+    db = FakeDatabase()
+    for key in ("bad", "a", "b"):
+        db.create(key, new_game(5))
+    db.failing.add("bad")
+    cache = make_cache(db, flush_delay=0.02)
+    rng = random.Random(5)
+    play(cache, "bad", rng)
+    time.sleep(0.01)
+    play(cache, "a", rng)
+    play(cache, "b", rng)
+    time.sleep(0.5)
+
+    assert ("a", 1) in db.writes and ("b", 1) in db.writes
+    metrics = cache.metrics()
+    # Retried after 0.2 and 0.6 seconds, not on every pass of the flusher
+    assert 2 <= metrics["flush_errors"] <= 3 and metrics["dirty"] == 1
+
+    db.failing.clear()
+    cache.flush_all()
+    assert ("bad", 1) in db.writes and cache.metrics()["dirty"] == 0
+
+def test_failed_write_keeps_the_moves() -> None:
+    db = FakeDatabase()
+    db.create("a", new_game(6))
+    db.failing.add("a")
+    cache = make_cache(db)
+    rng = random.Random(6)
+    play(cache, "a", rng)
+    with pytest.raises(RuntimeError):
+        cache.flush("a")
+    play(cache, "a", rng)
+
+    db.failing.clear()
+    cache.flush("a")
+    assert db.writes == [("a", 2)]
+
+def test_least_recently_used_clean_games_are_evicted() -> None:
+    db = FakeDatabase()
+    for key in range(4):
+        db.create(key, new_game(key))
+    cache = make_cache(db, max_games=2)
+    rng = random.Random(7)
+    play(cache, 0, rng)
+    for key in (1, 2, 3):
+        with cache.checkout(key):
+            pass
+    # The dirty game stays until it is written
+    assert cache.contains(0) and not cache.contains(1) and not cache.contains(2)
+
+    cache.flush(0)
+    with cache.checkout(1):
+        pass
+    assert not cache.contains(0) and cache.contains(1) and cache.contains(3)
+    assert cache.metrics()["evictions"][game_cache.LRU] == 3
@@ -0,0 +1,88 @@
+import json
+import random
+
+import pytest
+
+from backend.game_scripts import game_state, main
+
+def play_random(game: game_state.GameState, rng: random.Random, moves: int) -> list:
+    # Plays legal moves, some of them passes, through main as the API does, and logs them with their diffs
+    log = []
+    for _ in range(moves):
+        if main.is_game_over(game):
+            break
+        legal = sorted(game.get_possible_moves())
+        move = rng.choice(legal) if legal and rng.random() < 0.95 else "pass"
+        assert main.make_player_move(game, move)
+        log.append((move, main.get_move_diff(game, move)))
+    return log
+
+def comparable(game: game_state.GameState) -> str:
+    data = game.to_dict()
+    data["prev_graphs"] = sorted(data["prev_graphs"])
+    for plyer in data["players"].values():
+        plyer["score"] = float(plyer["score"])
+    return json.dumps(data, sort_keys=True)
+
+@pytest.mark.parametrize("seed", range(12))
+def test_bytes_round_trip(seed: int) -> None:
+    rng = random.Random(seed)
+    random.seed(seed)
+    height, width = rng.randint(3, 13), rng.randint(3, 13)
+    game = main.create_game(rng.choice(["easy", "medium", "hard", "very_hard", "insane", "self"]), height, width)
+    play_random(game, rng, rng.randint(0, 2 * height * width))
+
+    data = game.to_bytes()
+    restored = game_state.GameState.from_bytes(data)
+    assert comparable(restored) == comparable(game)
+    assert restored.board.hash == game.board.hash and restored.to_bytes() == data
+    assert [type(plyer) for plyer in restored.players.values()] == [type(plyer) for plyer in game.players.values()]
+    assert restored.get_possible_moves() == game.get_possible_moves()
+
+@pytest.mark.parametrize("engine", ["array", "bitboard"])
+def test_restored_game_plays_on(engine: str) -> None:
+    rng = random.Random(7)
+    game = game_state.GameState("self", 7, 7)
+    play_random(game, rng, 30)
+    restored = game_state.GameState.from_bytes(game.to_bytes(), engine=engine)
+    for _ in range(40):
+        legal = sorted(game.get_possible_moves())
+        assert legal == sorted(restored.get_possible_moves())
+        if not legal:
+            break
+        move = rng.choice(legal)
+        assert game.place_router(move) == restored.place_router(move)
+        assert game.board.owner == restored.board.owner and game.board.control == restored.board.control
+
+def test_from_bytes_rejects_other_data() -> None:
+    with pytest.raises(ValueError):
+        game_state.GameState.from_bytes(b"not a game state")
+
+@pytest.mark.parametrize("seed", range(8))
+def test_record_with_move_diffs_restores_the_game(seed: int) -> None:
+    rng = random.Random(seed)
+    random.seed(seed)
+    game = main.create_game("medium", 6, 6)
+    record = main.get_game_record(game)
+    log = play_random(game, rng, 60)
+
+    restored = main.restore_game_from_record({**record, "moves": log})
+    assert comparable(restored) == comparable(game)
+    assert restored.board.hash == game.board.hash
+    assert main.get_turn(restored) == main.get_turn(game)
+
+def test_moves_logged_without_diffs_are_replayed() -> None:
+    rng = random.Random(3)
+    random.seed(3)
+    game = main.create_game("self", 5, 5)
+    record = main.get_game_record(game)
+    log = [(move, None) for move, _ in play_random(game, rng, 20)]
+    assert comparable(main.restore_game_from_record({**record, "moves": log})) == comparable(game)
+
+def test_legacy_json_record_restores() -> None:
+    rng = random.Random(5)
+    random.seed(5)
+    game = main.create_game("hard", 5, 5)
+    play_random(game, rng, 15)
+    legacy = json.loads(json.dumps(main.get_game_data(game)))
+    assert comparable(main.restore_game_from_record(legacy)) == comparable(game)